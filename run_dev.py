@@ -18,4 +18,5 @@ path_manager.initialize_paths(str(PROJECT_ROOT))
 # import after path_manager initialization
 from main import main  # noqa: E402
 
-main()
+if __name__ == "__main__":
+    main()
@@ -1,3 +1,4 @@
 from .core import OpenCHJAnnotator
+from .token_table import TokenTable
 
-__all__ = ["OpenCHJAnnotator"]
+__all__ = ["OpenCHJAnnotator", "TokenTable"]
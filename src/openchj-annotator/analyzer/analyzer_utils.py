@@ -1,9 +1,14 @@
 import json
 import logging
+import mmap
 import os
 import re
+import struct
+import sys
+from array import array
+from functools import lru_cache
 from pathlib import Path
-from typing import Dict, Optional
+from typing import Dict, Optional, Sequence, Tuple
 
 from utils.dictionary_info import get_dictionary_metadata
 
@@ -18,8 +23,18 @@ except ImportError as e:
         "This will likely cause issues finding resources."
     )
 
+JIS_PLANES = 2
+JIS_ROWS = 94
+JIS_CELLS = 94
 
-def load_jis_mapping() -> Dict[str, str]:
+# Binary gaiji table: header identifying the source JSON, then one uint32
+# code point per men-ku-ten cell, so the file can be memory-mapped as is
+GAIJI_TABLE_CACHE_FILENAME = "jis_mapping.bin"
+GAIJI_TABLE_MAGIC = b"OCJM0001"
+GAIJI_TABLE_HEADER_FORMAT = "<8s?xxxxxxxqq"
+
+
+def _find_jis_mapping_file() -> Optional[Path]:
     jis_mapping_filename = "jis_mapping.json"
 
     if _pm_module:
@@ -28,14 +43,13 @@ def load_jis_mapping() -> Dict[str, str]:
                 "data", jis_mapping_filename
             )
             if mapping_file_path.exists() and mapping_file_path.is_file():
-                with open(mapping_file_path, "r", encoding="utf-8") as f:
-                    return json.load(f)
+                return mapping_file_path
             else:
                 logging.error(
                     f"jis_mapping.json NOT FOUND via path_manager at: {mapping_file_path}"
                 )
         except Exception as e:
-            logging.error(f"Error loading jis_mapping.json via path_manager: {e}")
+            logging.error(f"Error locating jis_mapping.json via path_manager: {e}")
     else:
         logging.error(
             "path_manager module is not available in analyzer.utils. Cannot load jis_mapping.json reliably."
@@ -50,8 +64,7 @@ def load_jis_mapping() -> Dict[str, str]:
             f"Attempting fallback load of jis_mapping.json from: {fallback_path}"
         )
         if fallback_path.exists() and fallback_path.is_file():
-            with open(fallback_path, "r", encoding="utf-8") as f:
-                return json.load(f)
+            return fallback_path
         else:
             logging.error(
                 f"jis_mapping.json NOT FOUND via fallback path: {fallback_path}"
@@ -59,12 +72,131 @@ def load_jis_mapping() -> Dict[str, str]:
     except Exception as e_fallback:
         logging.error(f"Error in fallback load of jis_mapping.json: {e_fallback}")
 
+    return None
+
+
+def load_jis_mapping() -> Dict[str, str]:
+    mapping_file_path = _find_jis_mapping_file()
+    if mapping_file_path is not None:
+        try:
+            with open(mapping_file_path, "r", encoding="utf-8") as f:
+                return json.load(f)
+        except Exception as e:
+            logging.error(f"Error loading jis_mapping.json: {e}")
+
     logging.critical(
         "CRITICAL: Failed to load jis_mapping.json. Aozora formatting will be incorrect."
     )
     return {}
 
 
+_jis_mapping: Optional[Dict[str, str]] = None
+
+
+def get_jis_mapping() -> Dict[str, str]:
+    global _jis_mapping
+    if _jis_mapping is None:
+        _jis_mapping = load_jis_mapping()
+    return _jis_mapping
+
+
+def gaiji_table_index(plane: int, row: int, cell: int) -> Optional[int]:
+    if 1 <= plane <= JIS_PLANES and 1 <= row <= JIS_ROWS and 1 <= cell <= JIS_CELLS:
+        return ((plane - 1) * JIS_ROWS + (row - 1)) * JIS_CELLS + (cell - 1)
+    return None
+
+
+def build_gaiji_table(jis_mapping: Dict[str, str]) -> array:
+    # Code points indexed by men-ku-ten; 0 marks an unmapped cell
+    gaiji_table = array("I", bytes(4 * JIS_PLANES * JIS_ROWS * JIS_CELLS))
+    for jis_key, unicode_char in jis_mapping.items():
+        try:
+            plane_str, row_str, cell_str = jis_key.split("-")
+            table_index = gaiji_table_index(int(plane_str), int(row_str), int(cell_str))
+        except ValueError:
+            continue
+        if table_index is not None and len(unicode_char) == 1:
+            gaiji_table[table_index] = ord(unicode_char)
+    return gaiji_table
+
+
+def _gaiji_table_header(mapping_file_path: Path) -> bytes:
+    mapping_stat = mapping_file_path.stat()
+    return struct.pack(
+        GAIJI_TABLE_HEADER_FORMAT,
+        GAIJI_TABLE_MAGIC,
+        sys.byteorder == "little",
+        mapping_stat.st_mtime_ns,
+        mapping_stat.st_size,
+    )
+
+
+def _get_gaiji_table_cache_path() -> Path:
+    from utils.file_utils import get_app_config_dir
+
+    return get_app_config_dir() / "cache" / GAIJI_TABLE_CACHE_FILENAME
+
+
+def _map_gaiji_table(cache_path: Path, expected_header: bytes) -> Optional[Sequence]:
+    table_size = len(expected_header) + 4 * JIS_PLANES * JIS_ROWS * JIS_CELLS
+    try:
+        with open(cache_path, "rb") as f:
+            if os.fstat(f.fileno()).st_size != table_size:
+                return None
+            mapped = mmap.mmap(f.fileno(), 0, access=mmap.ACCESS_READ)
+    except (OSError, ValueError):
+        return None
+    if mapped[: len(expected_header)] != expected_header:
+        mapped.close()
+        return None
+    return memoryview(mapped)[len(expected_header) :].cast("I")
+
+
+def _write_gaiji_table(cache_path: Path, header: bytes, gaiji_table: array) -> None:
+    cache_path.parent.mkdir(parents=True, exist_ok=True)
+    temp_path = cache_path.with_name(f"{cache_path.name}.{os.getpid()}.tmp")
+    with open(temp_path, "wb") as f:
+        f.write(header)
+        f.write(gaiji_table.tobytes())
+    os.replace(temp_path, cache_path)
+
+
+def load_gaiji_table() -> Sequence:
+    mapping_file_path = _find_jis_mapping_file()
+    if mapping_file_path is None:
+        return build_gaiji_table(get_jis_mapping())
+
+    try:
+        header = _gaiji_table_header(mapping_file_path)
+        cache_path = _get_gaiji_table_cache_path()
+    except Exception as e:
+        logging.warning(f"Gaiji table cache unavailable: {e}")
+        return build_gaiji_table(get_jis_mapping())
+
+    gaiji_table = _map_gaiji_table(cache_path, header)
+    if gaiji_table is not None:
+        return gaiji_table
+
+    # Missing or stale: rebuild from jis_mapping.json and keep the binary form
+    built_table = build_gaiji_table(get_jis_mapping())
+    try:
+        _write_gaiji_table(cache_path, header, built_table)
+    except OSError as e:
+        logging.warning(f"Could not write gaiji table cache {cache_path}: {e}")
+        return built_table
+    return _map_gaiji_table(cache_path, header) or built_table
+
+
+_gaiji_table: Optional[Sequence] = None
+
+
+def get_gaiji_table() -> Sequence:
+    global _gaiji_table
+    if _gaiji_table is None:
+        _gaiji_table = load_gaiji_table()
+    return _gaiji_table
+
+
 def jis_to_unicode(jis_code_str_from_note: str, jis_mapping: Dict[str, str]) -> str:
     if not jis_mapping:
         logging.error("jis_mapping is EMPTY in jis_to_unicode. Cannot convert.")
@@ -85,7 +217,7 @@ def jis_to_unicode(jis_code_str_from_note: str, jis_mapping: Dict[str, str]) ->
             return unicode_char
         else:
             logging.warning(
-                f"  Key '{jis_key}' NOT FOUND in jis_mapping. Input: '{jis_code_str_from_note}'. Sample keys from json: {list(jis_mapping.keys())[:20]}"
+                f"  Key '{jis_key}' NOT FOUND in jis_mapping. Input: '{jis_code_str_from_note}'"
             )
             return ""
     else:
@@ -146,6 +278,32 @@ def format_pos(features: list) -> str:
     return "-".join(pos_parts) if pos_parts else "不明"
 
 
+# Distinct feature strings in a corpus number in the tens of thousands
+FEATURE_CACHE_SIZE = 65536
+
+
+@lru_cache(maxsize=FEATURE_CACHE_SIZE)
+def decode_features(feature_raw: str) -> Tuple:
+    features = feature_raw.split(",")
+    num_features = len(features)
+
+    def get_feature(index, default=""):
+        if index < num_features and features[index] != "*":
+            return sys.intern(features[index])
+        return default
+
+    # lexeme is None when the dictionary has no entry; callers use the surface
+    return (
+        get_feature(7, None),
+        get_feature(6),
+        sys.intern(format_pos(features)),
+        get_feature(4),
+        get_feature(5),
+        get_feature(9),
+        get_feature(12),
+    )
+
+
 def csv_escape(value: str) -> str:
     if not isinstance(value, str):
         value = str(value)
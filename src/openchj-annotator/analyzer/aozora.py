@@ -0,0 +1,126 @@
+import logging
+import re
+from typing import Dict, List, Optional, Sequence, Tuple
+
+from .analyzer_utils import build_gaiji_table, gaiji_table_index, get_gaiji_table
+
+# Header/footer block delimited by lines of hyphens, and the 底本 colophon
+SEPARATOR_PATTERN = re.compile(r"^-{5,}.*?-{5,}$", re.MULTILINE)
+TEIHON_PATTERN = re.compile(r"^底本：", re.MULTILINE)
+
+RUBY_DELIMITERS = "｜《》"
+
+GAIJI_NOTE_REGEX = (
+    r"※?［＃[^］]*?第\d水準(?P<plane>\d+)-(?P<row>\d+)-(?P<cell>\d+)[^］]*?］"
+)
+GAIJI_NOTE_PATTERN = re.compile(GAIJI_NOTE_REGEX)
+
+# Every annotation form is matched by one alternation, left to right:
+# gaiji notes, ruby base markers (｜), ruby 《》, other ［＃］ notes and 〔〕
+ANNOTATION_PATTERN = re.compile(
+    rf"(?P<gaiji>{GAIJI_NOTE_REGEX})"
+    r"|(?P<ruby_base>｜)(?=(?P<ruby_base_text>[^｜《》]+?)《[^《》]*?》)"
+    r"|《[^《》]*?》"
+    r"|［＃[^］]*?］"
+    r"|〔.*?〕"
+)
+
+
+def has_colophon(text: str) -> bool:
+    # Cleanup drops everything from the 底本 colophon on
+    return TEIHON_PATTERN.search(text) is not None
+
+
+class AozoraCleaner:
+    def __init__(self, gaiji_table: Sequence[int]):
+        self.gaiji_table = gaiji_table
+
+    def lookup_gaiji(self, plane: int, row: int, cell: int) -> str:
+        table_index = gaiji_table_index(plane, row, cell)
+        code_point = self.gaiji_table[table_index] if table_index is not None else 0
+        if not code_point:
+            logging.warning(
+                f"  Key '{plane}-{row:02d}-{cell:02d}' NOT FOUND in jis_mapping."
+            )
+            return ""
+        return chr(code_point)
+
+    def _replace_gaiji_note(self, match) -> str:
+        return self.lookup_gaiji(
+            int(match.group("plane")), int(match.group("row")), int(match.group("cell"))
+        )
+
+    def _resolve_gaiji_notes(self, text: str) -> str:
+        if "［＃" not in text:
+            return text
+        return GAIJI_NOTE_PATTERN.sub(self._replace_gaiji_note, text)
+
+    def strip_annotations(self, text: str) -> str:
+        parts: List[str] = []
+        kept_start = 0
+        # Last character of the text with only gaiji notes resolved; a ruby
+        # base marker needs a base character before it in that text
+        previous_char = ""
+        for match in ANNOTATION_PATTERN.finditer(text):
+            match_start, match_end = match.span()
+            if match_start > kept_start:
+                parts.append(text[kept_start:match_start])
+                previous_char = text[match_start - 1]
+
+            if match.group("gaiji") is not None:
+                unicode_char = self._replace_gaiji_note(match)
+                parts.append(unicode_char)
+                if unicode_char:
+                    previous_char = unicode_char[-1]
+            elif match.group("ruby_base") is not None:
+                if (
+                    not previous_char
+                    or previous_char in RUBY_DELIMITERS
+                    or not self._resolve_gaiji_notes(match.group("ruby_base_text"))
+                ):
+                    parts.append(match.group(0))
+                previous_char = match.group(0)
+            else:
+                previous_char = text[match_end - 1]
+            kept_start = match_end
+
+        parts.append(text[kept_start:])
+        return "".join(parts)
+
+    def cleanup(self, text: str, at_start: bool = True, at_end: bool = True) -> str:
+        # at_start/at_end tell whether text begins/ends the document, so a
+        # window of a large file only gets the header or footer steps of
+        # its own edge
+        cleaned_text = text
+        parts = SEPARATOR_PATTERN.split(cleaned_text)
+        if at_start and len(parts) >= 3:
+            cleaned_text = parts[0].rstrip() + "\n\n" + parts[2].lstrip()
+        elif at_start and len(parts) == 2 and parts[0].strip() == "":
+            cleaned_text = parts[1].lstrip()
+        elif at_end and len(parts) == 2 and parts[1].strip() == "":
+            cleaned_text = parts[0].rstrip()
+        if at_end:
+            cleaned_text = TEIHON_PATTERN.split(cleaned_text, maxsplit=1)[0]
+        cleaned_text = self.strip_annotations(cleaned_text)
+        if at_start:
+            cleaned_text = cleaned_text.lstrip()
+        if at_end:
+            cleaned_text = cleaned_text.rstrip()
+        return cleaned_text
+
+
+_shared_cleaner: Optional[AozoraCleaner] = None
+_mapping_cleaner: Optional[Tuple[Dict[str, str], AozoraCleaner]] = None
+
+
+def get_aozora_cleaner(jis_mapping: Optional[Dict[str, str]] = None) -> AozoraCleaner:
+    global _shared_cleaner, _mapping_cleaner
+    if jis_mapping is None:
+        # Loaded on the first cleanup and shared by every analyzer
+        if _shared_cleaner is None:
+            _shared_cleaner = AozoraCleaner(get_gaiji_table())
+        return _shared_cleaner
+
+    if _mapping_cleaner is None or _mapping_cleaner[0] is not jis_mapping:
+        _mapping_cleaner = (jis_mapping, AozoraCleaner(build_gaiji_table(jis_mapping)))
+    return _mapping_cleaner[1]
@@ -0,0 +1,428 @@
+import glob
+import hashlib
+import logging
+import os
+import tempfile
+from concurrent.futures import ProcessPoolExecutor
+from contextlib import contextmanager
+from typing import BinaryIO, Iterable, Iterator, List, NamedTuple, Optional, Tuple
+
+from utils import path_manager
+from utils.file_utils import (
+    read_text_file,
+    replace_datetime_placeholder,
+    write_text_lines,
+)
+from utils.optimization import LARGE_FILE_THRESHOLD
+
+from .formatter import get_empty_output_text, get_output_extension, iter_output_rows
+from .parallel import get_pool_context
+from .result_cache import ResultCache
+
+INPUT_EXTENSION = ".txt"
+
+# Leading rows of each result kept for the GUI preview
+PREVIEW_MAX_LINES = 1000
+
+# Files handed to a worker per round trip; keeps results ordered without
+# paying one IPC exchange per small file
+BATCH_CHUNK_SIZE = 4
+
+_worker_annotator = None
+_worker_result_cache = None
+
+
+class BatchResult(NamedTuple):
+    filename: str
+    success: bool
+    # Written result path on success, error message otherwise
+    path_or_error: str
+    row_count: int = 0
+    preview: Tuple[str, ...] = ()
+    # SHA-256 of the input file bytes; only computed for the result cache
+    content_hash: str = ""
+    from_cache: bool = False
+
+
+def _iter_directory_files(directory: str, recursive: bool) -> Iterable[Tuple[str, str]]:
+    if recursive:
+        for root, dirs, files in os.walk(directory):
+            dirs.sort()
+            for name in sorted(files):
+                if name.lower().endswith(INPUT_EXTENSION):
+                    file_path = os.path.join(root, name)
+                    yield file_path, os.path.relpath(file_path, directory)
+    else:
+        for name in sorted(os.listdir(directory)):
+            file_path = os.path.join(directory, name)
+            if os.path.isfile(file_path) and name.lower().endswith(INPUT_EXTENSION):
+                yield file_path, name
+
+
+def collect_input_files(
+    inputs: Iterable[str], recursive: bool = False
+) -> List[Tuple[str, str]]:
+    """
+    Expand files, directories and glob patterns into input text files.
+
+    Args:
+        inputs: File paths, directory paths or glob patterns
+        recursive: Whether directories are searched including subfolders
+
+    Returns:
+        (file path, path relative to its input) pairs without duplicates
+    """
+    collected: List[Tuple[str, str]] = []
+    seen = set()
+    for input_path in inputs:
+        if os.path.isdir(input_path):
+            candidates = _iter_directory_files(input_path, recursive)
+        elif glob.has_magic(input_path):
+            candidates = (
+                (file_path, os.path.basename(file_path))
+                for file_path in sorted(glob.glob(input_path, recursive=True))
+                if os.path.isfile(file_path)
+            )
+        elif os.path.isfile(input_path):
+            candidates = [(input_path, os.path.basename(input_path))]
+        else:
+            logging.warning(f"Input not found: {input_path}")
+            continue
+
+        for file_path, relative_path in candidates:
+            key = os.path.abspath(file_path)
+            if key not in seen:
+                seen.add(key)
+                collected.append((file_path, relative_path))
+    return collected
+
+
+def get_output_affixes(config) -> Tuple[str, str]:
+    output_settings = config.config.get("output_settings", {}) or {}
+    prefix = output_settings.get("prefix", "") or ""
+    suffix = output_settings.get("suffix")
+    if not suffix:
+        from utils.dictionary_info import get_dictionary_based_suffix
+
+        suffix = get_dictionary_based_suffix(config)
+    return prefix, replace_datetime_placeholder(suffix)
+
+
+def build_output_path(
+    relative_path: str,
+    output_dir: str,
+    prefix: str = "",
+    suffix: str = "",
+    extension: str = INPUT_EXTENSION,
+) -> str:
+    relative_dir, filename = os.path.split(relative_path)
+    base_name = os.path.splitext(filename)[0]
+    return os.path.join(
+        output_dir, relative_dir, f"{prefix}{base_name}{suffix}{extension}"
+    )
+
+
+def analyze_file(
+    annotator,
+    file_path: str,
+    output_path: str,
+    preview_lines: int = PREVIEW_MAX_LINES,
+) -> BatchResult:
+    """
+    Analyze one text file and stream its result to output_path.
+
+    The result is written in the format of output_settings.format, row by
+    row as the tokens are produced, so neither the tokens nor the output
+    text of a file are held whole.
+
+    Args:
+        annotator: OpenCHJAnnotator instance used for the analysis
+        file_path: Path of the text file
+        output_path: Final path of the result file
+        preview_lines: Number of leading rows to keep for the preview
+
+    Returns:
+        BatchResult with the written path or an error message
+    """
+    filename = os.path.basename(file_path)
+    try:
+        if os.path.getsize(file_path) > LARGE_FILE_THRESHOLD:
+            results_data, rekion_pid, rekion_utterance_info = (
+                annotator.analyze_file_iter(file_path)
+            )
+        else:
+            text = read_text_file(file_path)
+            if not text.strip():
+                logging.warning(f"Empty file was read as a result: {filename}")
+                return BatchResult(
+                    filename, False, "The file is empty or all reading failed."
+                )
+
+            results_data, rekion_pid, rekion_utterance_info = (
+                annotator.analyze_with_source(text, source_filename=filename)
+            )
+
+        row_count = 0
+        preview: List[str] = []
+
+        def collect_summary(rows: Iterable[str]) -> Iterator[str]:
+            # Counted like summarize_result, so a cached result reports the
+            # same rows as a freshly written one
+            nonlocal row_count
+            for row in rows:
+                if _is_result_row(row):
+                    row_count += 1
+                    if len(preview) < preview_lines:
+                        preview.append(row)
+                yield row
+
+        rows = iter_output_rows(
+            results_data,
+            filename,
+            annotator.config,
+            rekion_pid=rekion_pid,
+            rekion_utterance_info=rekion_utterance_info,
+        )
+        with open_staged_file(output_path) as f:
+            write_text_lines(
+                collect_summary(rows),
+                f,
+                empty_text=get_empty_output_text(annotator.config),
+            )
+        return BatchResult(filename, True, output_path, row_count, tuple(preview))
+    except UnicodeDecodeError as ude:
+        logging.error(f"Encoding error during batch processing: {ude} - {filename}")
+        return BatchResult(filename, False, f"Encoding error: {str(ude)}")
+    except Exception as e:
+        logging.error(f"Batch analysis failed for {filename}: {e}")
+        return BatchResult(filename, False, str(e))
+
+
+def get_batch_worker_count(config, num_files: int) -> int:
+    max_workers = config.config.get("batch_processing", {}).get("max_workers", 0)
+    if not max_workers or max_workers < 0:
+        max_workers = os.cpu_count() or 1
+    return max(1, min(max_workers, num_files))
+
+
+def initialize_batch_worker(
+    config,
+    log_level: int = logging.WARNING,
+    project_root: Optional[str] = None,
+    is_frozen: bool = False,
+) -> None:
+    global _worker_annotator, _worker_result_cache
+    logging.getLogger().setLevel(log_level)
+    if project_root is not None:
+        # Workers must not rely on the entry script being re-imported to
+        # locate the bundled resources
+        path_manager.initialize_paths(project_root, is_frozen)
+    from .analyzer_utils import get_gaiji_table
+    from .core import OpenCHJAnnotator
+
+    _worker_annotator = OpenCHJAnnotator(config)
+    _worker_result_cache = ResultCache.for_config(config)
+    if config.config.get("aozora_cleanup", False):
+        get_gaiji_table()
+
+
+@contextmanager
+def open_staged_file(output_path: str) -> Iterator[BinaryIO]:
+    """
+    Open a "w+b" file next to output_path that replaces it on success.
+
+    Readers of output_path never see a partly written result, and a
+    failure leaves any previous file in place.
+    """
+    output_dir = os.path.dirname(os.path.abspath(output_path))
+    os.makedirs(output_dir, exist_ok=True)
+    fd, staged_path = tempfile.mkstemp(dir=output_dir, prefix=".", suffix=".part")
+    try:
+        with os.fdopen(fd, "w+b") as f:
+            yield f
+        os.replace(staged_path, output_path)
+    except BaseException:
+        try:
+            os.remove(staged_path)
+        except OSError:
+            pass
+        raise
+
+
+def write_result_file(
+    content: str, output_path: str, preview_lines: int = PREVIEW_MAX_LINES
+) -> Tuple[int, Tuple[str, ...]]:
+    """
+    Write a result next to its destination and rename it into place.
+
+    Rows and the preview are collected from the content being written, so
+    callers never have to read the file back.
+
+    Args:
+        content: Formatted result text
+        output_path: Final path of the result file
+        preview_lines: Number of leading rows to keep for the preview
+
+    Returns:
+        (number of rows, leading rows for the preview)
+    """
+    content = content.replace("\r\n", "\n")
+    with open_staged_file(output_path) as f:
+        f.write(content.encode("utf-8"))
+
+    return summarize_result(content.split("\n"), preview_lines)
+
+
+def _is_result_row(line: str) -> bool:
+    return bool(line.strip()) and not line.startswith("ファイル名")
+
+
+def summarize_result(
+    lines: Iterable[str], preview_lines: int = PREVIEW_MAX_LINES
+) -> Tuple[int, Tuple[str, ...]]:
+    row_count = 0
+    preview: List[str] = []
+    for line in lines:
+        line = line.rstrip("\n")
+        if _is_result_row(line):
+            row_count += 1
+            if len(preview) < preview_lines:
+                preview.append(line)
+    return row_count, tuple(preview)
+
+
+def hash_file(file_path: str, chunk_size: int = 1024 * 1024) -> str:
+    digest = hashlib.sha256()
+    with open(file_path, "rb") as f:
+        for chunk in iter(lambda: f.read(chunk_size), b""):
+            digest.update(chunk)
+    return digest.hexdigest()
+
+
+def _reuse_cached_result(
+    result_cache,
+    cache_key: str,
+    output_path: Optional[str],
+    extension: str = INPUT_EXTENSION,
+) -> Optional[Tuple[str, int, Tuple[str, ...]]]:
+    if output_path is None:
+        fd, output_path = tempfile.mkstemp(suffix=extension)
+        os.close(fd)
+        if not result_cache.fetch(cache_key, output_path):
+            os.remove(output_path)
+            return None
+    elif not result_cache.fetch(cache_key, output_path):
+        return None
+    with open(output_path, "r", encoding="utf-8", newline="\n") as f:
+        row_count, preview = summarize_result(f)
+    return output_path, row_count, preview
+
+
+def analyze_file_to_path(
+    job: Tuple[str, Optional[str]], annotator=None, result_cache=None
+) -> BatchResult:
+    """
+    Analyze one file and write its result.
+
+    Args:
+        job: (input file path, output path); a None output path writes
+            to a new temporary file
+        annotator: Annotator to use instead of the worker's own one
+        result_cache: ResultCache to use along with annotator
+
+    Returns:
+        BatchResult with the written path or an error message
+    """
+    file_path, output_path = job
+    if annotator is None:
+        annotator, result_cache = _worker_annotator, _worker_result_cache
+    # Only the result cache keys on the input bytes; without it the hash
+    # would just be one more full read of every input
+    content_hash = ""
+    if result_cache is not None:
+        try:
+            content_hash = hash_file(file_path)
+        except OSError:
+            pass
+    extension = get_output_extension(annotator.config)
+
+    cache_key = None
+    if result_cache is not None and content_hash:
+        filename = os.path.basename(file_path)
+        cache_key = result_cache.key(content_hash, filename)
+        cached_result = _reuse_cached_result(
+            result_cache, cache_key, output_path, extension
+        )
+        if cached_result is not None:
+            output_path, row_count, preview = cached_result
+            return BatchResult(
+                filename, True, output_path, row_count, preview, content_hash, True
+            )
+
+    is_temporary_output = output_path is None
+    if is_temporary_output:
+        fd, output_path = tempfile.mkstemp(suffix=extension)
+        os.close(fd)
+
+    result = analyze_file(annotator, file_path, output_path)._replace(
+        content_hash=content_hash
+    )
+    if not result.success:
+        if is_temporary_output:
+            os.remove(output_path)
+        return result
+    if cache_key is not None:
+        result_cache.store(cache_key, output_path)
+    return result
+
+
+def iter_batch_results(
+    jobs: List[Tuple[str, Optional[str]]],
+    config,
+    num_workers: int = 1,
+    annotator=None,
+) -> Iterator[BatchResult]:
+    """
+    Analyze files, yielding results in the order of jobs.
+
+    With more than one worker the files are spread over a process pool
+    whose workers each build their annotator once; otherwise they are
+    analyzed in this process with annotator (or a new one).
+
+    Args:
+        jobs: (input file path, output path or None) pairs
+        config: Config used to build the worker annotators
+        num_workers: Number of worker processes
+        annotator: Existing annotator for in-process analysis
+
+    Yields:
+        BatchResult for each job
+    """
+    result_cache = ResultCache.for_config(config)
+    if num_workers <= 1 or len(jobs) <= 1:
+        if annotator is None:
+            from .core import OpenCHJAnnotator
+
+            annotator = OpenCHJAnnotator(config)
+        for job in jobs:
+            yield analyze_file_to_path(job, annotator, result_cache)
+    else:
+        with ProcessPoolExecutor(
+            max_workers=num_workers,
+            mp_context=get_pool_context(),
+            initializer=initialize_batch_worker,
+            initargs=(
+                config,
+                logging.getLogger().getEffectiveLevel(),
+                str(path_manager.get_project_root()),
+                path_manager.is_frozen_env(),
+            ),
+        ) as executor:
+            yield from executor.map(
+                analyze_file_to_path, jobs, chunksize=BATCH_CHUNK_SIZE
+            )
+
+    if result_cache is not None:
+        evicted = result_cache.prune()
+        if evicted:
+            logging.info(f"Evicted {evicted} entries from the result cache.")
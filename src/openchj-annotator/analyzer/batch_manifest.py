@@ -0,0 +1,153 @@
+import hashlib
+import json
+import logging
+import os
+import sqlite3
+import threading
+import time
+from typing import Dict, Optional, Tuple
+
+MANIFEST_FILENAME = ".openchj-manifest.sqlite3"
+
+STATUS_DONE = "done"
+STATUS_FAILED = "failed"
+
+_SCHEMA = """
+CREATE TABLE IF NOT EXISTS entries (
+    input_path TEXT PRIMARY KEY,
+    size INTEGER,
+    mtime_ns INTEGER,
+    content_hash TEXT,
+    dictionary_fingerprint TEXT,
+    settings_hash TEXT,
+    output_path TEXT,
+    status TEXT NOT NULL,
+    error TEXT,
+    updated_at REAL
+)
+"""
+
+
+def compute_settings_hash(config) -> str:
+    from .formatter import get_jsonl_unit, get_output_format
+    from .preprocessor import get_format_settings
+
+    settings = {
+        "format": get_format_settings(config),
+        "sentence_boundary": config.config.get("sentence_boundary_settings", {}),
+        "segmentation": config.config.get("segmentation", {}),
+        "subcorpus_name": config.config.get("subcorpus_name", ""),
+        "result_format": get_output_format(config),
+        "jsonl_unit": get_jsonl_unit(config),
+    }
+    serialized = json.dumps(settings, sort_keys=True, ensure_ascii=False, default=str)
+    return hashlib.sha256(serialized.encode("utf-8")).hexdigest()
+
+
+def compute_dictionary_key(config) -> str:
+    from .tagger_pool import config_dictionary_fingerprint
+
+    fingerprint = repr(config_dictionary_fingerprint(config))
+    return hashlib.sha256(fingerprint.encode("utf-8")).hexdigest()
+
+
+def _stat_signature(path: str) -> Tuple[Optional[int], Optional[int]]:
+    try:
+        stat_result = os.stat(path)
+        return stat_result.st_size, stat_result.st_mtime_ns
+    except OSError:
+        return None, None
+
+
+class BatchManifest:
+    """
+    Per-input record of a batch run, kept in an SQLite database.
+
+    Every finished file is committed immediately, so an interrupted run
+    can be resumed by skipping the inputs recorded as done.
+    """
+
+    def __init__(self, path: str, dictionary_fingerprint: str, settings_hash: str):
+        self.path = path
+        self.dictionary_fingerprint = dictionary_fingerprint
+        self.settings_hash = settings_hash
+        os.makedirs(os.path.dirname(os.path.abspath(path)), exist_ok=True)
+        self._connection = sqlite3.connect(path, check_same_thread=False)
+        self._connection.execute("PRAGMA journal_mode=WAL")
+        self._connection.execute("PRAGMA synchronous=NORMAL")
+        self._connection.execute(_SCHEMA)
+        self._connection.commit()
+        self._lock = threading.Lock()
+
+    @classmethod
+    def for_config(cls, path: str, config) -> "BatchManifest":
+        return cls(path, compute_dictionary_key(config), compute_settings_hash(config))
+
+    def is_complete(self, input_path: str, output_path: Optional[str]) -> bool:
+        """Whether input_path was already done with the current settings."""
+        with self._lock:
+            row = self._connection.execute(
+                "SELECT size, mtime_ns, dictionary_fingerprint, settings_hash,"
+                " output_path, status FROM entries WHERE input_path = ?",
+                (os.path.abspath(input_path),),
+            ).fetchone()
+        if row is None:
+            return False
+        size, mtime_ns, fingerprint, settings_hash, recorded_output, status = row
+        if (
+            status != STATUS_DONE
+            or fingerprint != self.dictionary_fingerprint
+            or settings_hash != self.settings_hash
+            or (size, mtime_ns) != _stat_signature(input_path)
+        ):
+            return False
+        if output_path is not None and os.path.abspath(output_path) != recorded_output:
+            return False
+        return bool(recorded_output) and os.path.exists(recorded_output)
+
+    def record(
+        self,
+        input_path: str,
+        output_path: Optional[str],
+        success: bool,
+        content_hash: str = "",
+        error: Optional[str] = None,
+    ) -> None:
+        size, mtime_ns = _stat_signature(input_path)
+        with self._lock:
+            self._connection.execute(
+                "INSERT OR REPLACE INTO entries VALUES (?, ?, ?, ?, ?, ?, ?, ?, ?, ?)",
+                (
+                    os.path.abspath(input_path),
+                    size,
+                    mtime_ns,
+                    content_hash,
+                    self.dictionary_fingerprint,
+                    self.settings_hash,
+                    os.path.abspath(output_path) if output_path else None,
+                    STATUS_DONE if success else STATUS_FAILED,
+                    error,
+                    time.time(),
+                ),
+            )
+            self._connection.commit()
+
+    def counts(self) -> Dict[str, int]:
+        with self._lock:
+            rows = self._connection.execute(
+                "SELECT status, COUNT(*) FROM entries GROUP BY status"
+            ).fetchall()
+        return dict(rows)
+
+    def close(self) -> None:
+        with self._lock:
+            try:
+                self._connection.close()
+            except sqlite3.Error as e:
+                logging.warning(f"Failed to close batch manifest {self.path}: {e}")
+
+    def __enter__(self) -> "BatchManifest":
+        return self
+
+    def __exit__(self, *exc_info) -> None:
+        self.close()
@@ -1,30 +1,60 @@
+import json
 import logging
 import os
-from typing import Dict, List, Optional, Tuple
+from typing import (
+    TYPE_CHECKING,
+    BinaryIO,
+    Dict,
+    Iterable,
+    Iterator,
+    List,
+    Optional,
+    Tuple,
+)
 
-import fugashi
 from utils.file_utils import (
     get_downloads_directory,
     read_text_file,
     replace_datetime_placeholder,
-    write_text_file,
 )
-from utils.tag_processor import TagProcessor
+from utils.optimization import LARGE_FILE_THRESHOLD, TextWindowReader
+from utils.tag_processor import TagProcessor, get_tag_matcher
 
 from config import Config
 
-from .analyzer_utils import format_pos, get_dictionary_display_name, load_jis_mapping
+from .analyzer_utils import (
+    decode_features,
+    get_dictionary_display_name,
+    get_jis_mapping,
+)
+from .aozora import has_colophon
+from .formatter import get_output_extension, write_results
+from .incremental import IncrementalState, update_sentence_tokens
 from .preprocessor import apply_text_formatting_for_display, get_format_settings
 from .rekion_data_processor import (
+    UtteranceIndex,
     extract_pid_from_filename,
-    find_utterance_id_for_token,
     is_rekion_data,
     preprocess_rekion_text,
 )
+from .segmenter import (
+    SEGMENT_MAX_CHARS,
+    SEGMENT_TARGET_CHARS,
+    split_into_segments,
+    split_into_sentences,
+)
 from .sentence_boundary import (
     adjust_sentence_boundaries,
+    find_explicit_boundary_token_indices,
+    iter_adjusted_sentence_boundaries,
     strip_explicit_boundary_markers,
 )
+from .sentence_cache import DEFAULT_MAX_CACHED_SENTENCES, SentenceCache
+from .tagger_pool import config_dictionary_fingerprint, get_tagger_pool
+from .token_table import TokenTable
+
+if TYPE_CHECKING:
+    import fugashi
 
 
 class OpenCHJAnnotator:
@@ -33,15 +63,61 @@ class OpenCHJAnnotator:
     def __init__(self, config=None):
         os.environ.pop("MECABRC", None)
         self.config = config or Config()
+        self.dictionary_fingerprint = config_dictionary_fingerprint(self.config)
         self.tagger = self._initialize_tagger()
-        self.jis_mapping = load_jis_mapping()
+        # MeCab taggers are not thread-safe and the pool shares them
+        self._tagger_lock = get_tagger_pool().lock_for(self.tagger)
+        self.sentence_cache: Optional[SentenceCache] = None
+        self._sentence_cache_settings: Optional[Tuple[Dict, Dict]] = None
+        self.reload_settings()
+
+    def reload_settings(self, config=None) -> None:
+        """
+        Rebuild the state derived from the config, keeping the tagger.
+
+        Callers that reuse an annotator while the dictionary is unchanged
+        call this after the other settings may have changed.
+        """
+        if config is not None:
+            self.config = config
         tag_special_settings_from_conf = self.config.config.get(
             "tag_special_settings", {}
         )
         self.tag_processor = TagProcessor(tag_special_settings_from_conf)
-        self._parallel_warning_shown = False
+        analysis_cache_settings = self.config.config.get("analysis_cache", {})
+        segmentation_settings = self.config.config.get("segmentation", {})
+        # Cached sentences stay valid while neither setting changes
+        sentence_cache_settings = (
+            dict(analysis_cache_settings),
+            dict(segmentation_settings),
+        )
+        if sentence_cache_settings != self._sentence_cache_settings:
+            self._sentence_cache_settings = sentence_cache_settings
+            self.sentence_cache = (
+                SentenceCache(
+                    analysis_cache_settings.get(
+                        "max_sentences", DEFAULT_MAX_CACHED_SENTENCES
+                    )
+                )
+                if analysis_cache_settings.get("enabled", False)
+                else None
+            )
+        self.segment_max_chars = segmentation_settings.get(
+            "max_chars", SEGMENT_MAX_CHARS
+        )
+        self.segment_target_chars = min(
+            segmentation_settings.get("target_chars", SEGMENT_TARGET_CHARS),
+            self.segment_max_chars,
+        )
+        self._incremental_state: Optional[IncrementalState] = None
+
+    @property
+    def jis_mapping(self) -> Dict[str, str]:
+        return get_jis_mapping()
+
+    def _initialize_tagger(self) -> "fugashi.Tagger":
+        import fugashi
 
-    def _initialize_tagger(self) -> fugashi.Tagger:
         active_dict = self.config.get_active_dictionary()
         dict_path = self.config.get_unidic_path(active_dict)
         user_dict_path = (
@@ -50,17 +126,15 @@ class OpenCHJAnnotator:
         self.user_dict_incompatible = False
 
         rc_option = "-r NUL" if os.name == "nt" else "-r /dev/null"
+        tagger_pool = get_tagger_pool()
 
         try:
             if active_dict == "lite" or dict_path is None or dict_path == "bundled":
                 try:
                     tagger_options_lite = rc_option
-                    tagger = fugashi.Tagger(tagger_options_lite)
-                    try:
-                        tagger("テスト文章です")
-                    except Exception as e:
-                        logging.warning(f"UniDic-lite test error: {e}")
-                    return tagger
+                    return tagger_pool.get(
+                        tagger_options_lite, self._create_lite_tagger
+                    )
                 except Exception as e:
                     logging.error(f"UniDic-lite initialization failed: {e}")
                     try:
@@ -124,10 +198,12 @@ class OpenCHJAnnotator:
 
                 if user_dict_option_part:
                     try:
-                        tagger = self._create_tagger_with_fallback(
-                            options_with_user_dict
+                        tagger = tagger_pool.get(
+                            options_with_user_dict,
+                            self._create_validated_tagger,
+                            dict_path,
+                            user_dict_path,
                         )
-                        tagger("テスト文章です")
                         self.user_dict_incompatible = False
                         return tagger
                     except Exception as e_user_dict:
@@ -141,9 +217,9 @@ class OpenCHJAnnotator:
                                 f"User dictionary '{user_dict_path}' is incompatible with system dictionary '{dict_path}'."
                             )
                 try:
-                    tagger = self._create_tagger_with_fallback(options_system_only)
-                    tagger("テスト文章です")
-                    return tagger
+                    return tagger_pool.get(
+                        options_system_only, self._create_validated_tagger, dict_path
+                    )
                 except Exception as e_system_only:
                     logging.warning(
                         f"Tagger initialization with system dictionary only also failed ('{options_system_only}'): {e_system_only}"
@@ -165,7 +241,24 @@ class OpenCHJAnnotator:
             logging.critical(f"Outer Tagger initialization failed: {e_outer}")
             return fugashi.Tagger(rc_option)
 
+    def _create_lite_tagger(self, options: str) -> "fugashi.Tagger":
+        import fugashi
+
+        tagger = fugashi.Tagger(options)
+        try:
+            tagger("テスト文章です")
+        except Exception as e:
+            logging.warning(f"UniDic-lite test error: {e}")
+        return tagger
+
+    def _create_validated_tagger(self, options: str):
+        tagger = self._create_tagger_with_fallback(options)
+        tagger("テスト文章です")
+        return tagger
+
     def _create_tagger_with_fallback(self, options: str):
+        import fugashi
+
         try:
             return fugashi.Tagger(options)
         except Exception as tagger_error:
@@ -218,31 +311,31 @@ class OpenCHJAnnotator:
         return "Analyzer not initialized"
 
     def _create_morph_token_dict_from_node(
-        self, token: fugashi.UnidicNode, position: int = 0
+        self, token: "fugashi.UnidicNode", position: int = 0
     ) -> Dict:
         try:
-            features = token.feature_raw.split(",")
-            num_features = len(features)
-
-            def get_feature(index, default=""):
-                return (
-                    features[index]
-                    if index < num_features and features[index] != "*"
-                    else default
-                )
+            (
+                lexeme,
+                lexeme_reading,
+                pos,
+                conjugation_type,
+                conjugation_form,
+                pronunciation,
+                word_type,
+            ) = decode_features(token.feature_raw)
 
             original_char_start = position
             original_char_end = position + len(token.surface)
 
             metadata = {
                 "surface_form": token.surface,
-                "lexeme": get_feature(7, token.surface),
-                "lexeme_reading": get_feature(6, ""),
-                "pos": format_pos(features),
-                "conjugation_type": get_feature(4, ""),
-                "conjugation_form": get_feature(5, ""),
-                "pronunciation": get_feature(9, ""),
-                "word_type": get_feature(12, ""),
+                "lexeme": token.surface if lexeme is None else lexeme,
+                "lexeme_reading": lexeme_reading,
+                "pos": pos,
+                "conjugation_type": conjugation_type,
+                "conjugation_form": conjugation_form,
+                "pronunciation": pronunciation,
+                "word_type": word_type,
                 "_original_char_start": original_char_start,
                 "_original_char_end": original_char_end,
                 "_is_special_tag": False,
@@ -294,148 +387,13 @@ class OpenCHJAnnotator:
         }
         return metadata
 
-    def _find_special_tag_sequences(
-        self, fugashi_tokens: List[fugashi.UnidicNode], tag_special_patterns: List[Dict]
-    ) -> List[Tuple[int, int, Dict]]:
-        identified_sequences = []
-
-        def get_bracket_chars_for_pattern(bracket_type_str: str) -> Tuple[str, str]:
-            brackets_map = {
-                "angle": ("<", ">"),
-                "angle_full": ("＜", "＞"),
-                "round": ("(", ")"),
-                "round_full": ("（", "）"),
-                "square": ("[", "]"),
-                "square_full": ("［", "］"),
-                "curly": ("{", "}"),
-                "curly_full": ("｛", "｝"),
-                "corner": ("【", "】"),
-            }
-            return brackets_map.get(bracket_type_str, ("", ""))
-
-        n_tokens = len(fugashi_tokens)
-        potential_matches = []
-
-        for pattern_config in tag_special_patterns:
-            start_bracket_char, end_bracket_char = get_bracket_chars_for_pattern(
-                pattern_config.get("bracket_type", "")
-            )
-            tag_key = pattern_config.get("tag_content", "")
-            expected_surface = pattern_config.get("surface_form", "")
-
-            if not all(
-                [start_bracket_char, end_bracket_char, tag_key, expected_surface]
-            ):
-                logging.warning(
-                    f"Skipping incomplete special tag pattern: {pattern_config}"
-                )
-                continue
-
-            for i in range(n_tokens):
-
-                if fugashi_tokens[i].surface == start_bracket_char:
-                    current_idx = i + 1
-
-                    key_tokens_surfaces = []
-                    key_match_end_idx = -1
-
-                    temp_key_idx = current_idx
-                    accumulated_key_surface = ""
-                    while temp_key_idx < n_tokens and len(
-                        accumulated_key_surface
-                    ) < len(tag_key):
-                        accumulated_key_surface += fugashi_tokens[temp_key_idx].surface
-                        key_tokens_surfaces.append(fugashi_tokens[temp_key_idx].surface)
-                        temp_key_idx += 1
-                        if accumulated_key_surface == tag_key:
-                            key_match_end_idx = temp_key_idx - 1
-                            break
-
-                    if key_match_end_idx == -1:
-                        continue
-
-                    current_idx = key_match_end_idx + 1
-
-                    if (
-                        current_idx < n_tokens
-                        and fugashi_tokens[current_idx].surface == ":"
-                    ):
-                        current_idx += 1
-
-                        if (
-                            current_idx < n_tokens
-                            and fugashi_tokens[current_idx].surface == " "
-                        ):
-                            current_idx += 1
-
-                    content_tokens_surfaces = []
-                    content_match_end_idx = -1
-                    accumulated_content_surface = ""
-
-                    temp_content_idx = current_idx
-
-                    while temp_content_idx < n_tokens:
-                        token_surf = fugashi_tokens[temp_content_idx].surface
-
-                        if token_surf == end_bracket_char:
-                            break
-
-                        next_accumulated_content_surface = (
-                            accumulated_content_surface + token_surf
-                        )
-
-                        if expected_surface.startswith(
-                            next_accumulated_content_surface
-                        ) or next_accumulated_content_surface.startswith(
-                            expected_surface
-                        ):
-
-                            accumulated_content_surface = (
-                                next_accumulated_content_surface
-                            )
-                            content_tokens_surfaces.append(token_surf)
-
-                            normalized_accumulated = "".join(
-                                accumulated_content_surface.split()
-                            )
-                            normalized_expected = "".join(expected_surface.split())
-
-                            if normalized_accumulated == normalized_expected:
-                                content_match_end_idx = temp_content_idx
-                                break
-                        else:
-                            break
-
-                        temp_content_idx += 1
-
-                    if content_match_end_idx == -1:
-                        continue
-
-                    current_idx = content_match_end_idx + 1
-
-                    if (
-                        current_idx < n_tokens
-                        and fugashi_tokens[current_idx].surface == end_bracket_char
-                    ):
-
-                        potential_matches.append((i, current_idx, pattern_config))
-
-        potential_matches.sort(key=lambda x: (x[0], -(x[1] - x[0])))
-
-        last_tag_end_idx = -1
-        for start_idx, end_idx, config in potential_matches:
-            if start_idx > last_tag_end_idx:
-                identified_sequences.append((start_idx, end_idx, config))
-                last_tag_end_idx = end_idx
-
-        return identified_sequences
-
-    def analyze(
+    def _prepare_text_for_tagging(
         self,
         text: str,
         temp_format_settings: Optional[Dict] = None,
-        preserve_char_positions: bool = False,
-    ) -> List[Dict]:
+        at_start: bool = True,
+        at_end: bool = True,
+    ) -> Tuple[str, Optional[List[int]], Dict, Dict]:
         current_format_settings = get_format_settings(self.config, temp_format_settings)
         sentence_boundary_settings = self.config.config.get(
             "sentence_boundary_settings", {}
@@ -450,7 +408,8 @@ class OpenCHJAnnotator:
         text_formatted_for_fugashi = apply_text_formatting_for_display(
             text_for_processing,
             current_format_settings,
-            self.jis_mapping,
+            at_start=at_start,
+            at_end=at_end,
         )
         explicit_boundary_positions = None
         if sentence_boundary_settings.get("use_explicit_marker", False):
@@ -459,88 +418,145 @@ class OpenCHJAnnotator:
                     text_formatted_for_fugashi, marker=explicit_marker_placeholder
                 )
             )
-        try:
-            fugashi_output_iterable = self.tagger(text_formatted_for_fugashi)
-            fugashi_nodes = list(fugashi_output_iterable)
-
-        except Exception as e:
-            logging.error(f"Fugashi parsing (formatted text) failed: {e}")
-            import traceback
-
-            logging.error(traceback.format_exc())
-            return []
+        return (
+            text_formatted_for_fugashi,
+            explicit_boundary_positions,
+            current_format_settings,
+            sentence_boundary_settings,
+        )
 
+    def _segment_formatted_text(
+        self,
+        text_formatted: str,
+        current_format_settings: Dict,
+        explicit_boundary_positions: Optional[List[int]] = None,
+    ) -> List[Tuple[int, int]]:
+        protected_spans = None
         tag_special_patterns = current_format_settings.get(
             "tag_special_settings", {}
         ).get("tag_patterns", [])
-
-        special_tag_sequences = self._find_special_tag_sequences(
-            fugashi_nodes, tag_special_patterns
+        if len(text_formatted) > self.segment_target_chars and tag_special_patterns:
+            protected_spans = get_tag_matcher(tag_special_patterns).find_spans(
+                text_formatted
+            )
+        return split_into_segments(
+            text_formatted,
+            self.segment_target_chars,
+            protected_spans,
+            max_chars=self.segment_max_chars,
+            boundary_positions=explicit_boundary_positions,
         )
 
+    def _tokenize_segment(
+        self,
+        segment_text: str,
+        segment_offset: int,
+        tag_special_patterns: List[Dict],
+    ) -> Tuple[List[Dict], int]:
+        # Special tags are matched on the characters; only the text between
+        # them goes through MeCab and each tag is spliced in as one token.
         all_tokens_raw: List[Dict] = []
-        current_position_in_formatted_text = 0
-        fugashi_node_idx = 0
-        special_tag_info_idx = 0
-        special_tag_sequences.sort(key=lambda x: x[0])
-
-        while fugashi_node_idx < len(fugashi_nodes):
-            current_node_is_start_of_a_special_tag = False
-            tag_to_process_this_iteration = None
-
-            if special_tag_info_idx < len(special_tag_sequences):
-                next_special_tag_start_node_idx, _end_idx, _config = (
-                    special_tag_sequences[special_tag_info_idx]
-                )
-                if fugashi_node_idx == next_special_tag_start_node_idx:
-                    current_node_is_start_of_a_special_tag = True
-                    tag_to_process_this_iteration = special_tag_sequences[
-                        special_tag_info_idx
-                    ]
-
-            if (
-                current_node_is_start_of_a_special_tag
-                and tag_to_process_this_iteration is not None
-            ):
-                tag_start_node_idx, tag_end_node_idx, tag_pattern_config_from_find = (
-                    tag_to_process_this_iteration
-                )
-
-                content_absolute_original_char_start = (
-                    current_position_in_formatted_text
-                )
-
-                special_token_dict = self._create_special_token_dict(
-                    tag_pattern_config_from_find,
-                    content_absolute_original_char_start,
-                )
-
-                if special_token_dict:
-                    all_tokens_raw.append(special_token_dict)
+        current_position_in_formatted_text = segment_offset
+        gap_start = 0
+
+        for tag_start, tag_end, _tag_text, tag_pattern_config in get_tag_matcher(
+            tag_special_patterns
+        ).finditer(segment_text):
+            current_position_in_formatted_text = self._tokenize_gap(
+                segment_text[gap_start:tag_start],
+                segment_offset + gap_start,
+                all_tokens_raw,
+            )
 
-                if special_token_dict and "_original_char_end" in special_token_dict:
-                    current_position_in_formatted_text = special_token_dict[
-                        "_original_char_end"
-                    ]
-                else:
-                    logging.error(
-                        "  CRITICAL: special_token_dict is invalid for special tag!"
-                    )
-                    current_position_in_formatted_text += len(
-                        tag_pattern_config_from_find.get("surface_form", "")
-                    )
+            special_token_dict = self._create_special_token_dict(
+                tag_pattern_config, segment_offset + tag_start
+            )
+            all_tokens_raw.append(special_token_dict)
 
-                fugashi_node_idx = tag_end_node_idx + 1
-                special_tag_info_idx += 1
+            gap_start = tag_end
+            current_position_in_formatted_text = segment_offset + tag_end
 
-            else:
-                if fugashi_node_idx >= len(fugashi_nodes):
-                    break
-                node = fugashi_nodes[fugashi_node_idx]
+        if gap_start < len(segment_text):
+            current_position_in_formatted_text = self._tokenize_gap(
+                segment_text[gap_start:],
+                segment_offset + gap_start,
+                all_tokens_raw,
+            )
 
-                morph_token_original_char_start = current_position_in_formatted_text
+        return all_tokens_raw, current_position_in_formatted_text
+
+    def _tokenize_gap(
+        self, gap_text: str, gap_offset: int, all_tokens_raw: List[Dict]
+    ) -> int:
+        if self.sentence_cache is None:
+            return self._tag_text(gap_text, gap_offset, all_tokens_raw)
+
+        # With the cache on, text is always tagged sentence by sentence so a
+        # result never depends on which sentences happened to be cached.
+        current_position_in_formatted_text = gap_offset
+        for sentence_start, sentence_end in split_into_sentences(gap_text):
+            current_position_in_formatted_text = self._tokenize_cached_sentence(
+                gap_text[sentence_start:sentence_end],
+                gap_offset + sentence_start,
+                all_tokens_raw,
+            )
+        return current_position_in_formatted_text
+
+    def _tokenize_cached_sentence(
+        self, sentence_text: str, sentence_offset: int, all_tokens_raw: List[Dict]
+    ) -> int:
+        cache_key = (sentence_text, self.dictionary_fingerprint)
+        cached_entry = self.sentence_cache.get(cache_key)
+        if cached_entry is None:
+            sentence_tokens: List[Dict] = []
+            consumed_length = self._tag_text(sentence_text, 0, sentence_tokens)
+            self.sentence_cache.put(cache_key, sentence_tokens, consumed_length)
+        else:
+            sentence_tokens, consumed_length = cached_entry
+
+        # Cached records stay untouched; later stages get re-based copies
+        for token in sentence_tokens:
+            token_copy = dict(token)
+            token_copy["_original_char_start"] += sentence_offset
+            token_copy["_original_char_end"] += sentence_offset
+            all_tokens_raw.append(token_copy)
+        return sentence_offset + consumed_length
+
+    def get_cache_stats(self) -> Optional[Dict[str, int]]:
+        if self.sentence_cache is None:
+            return None
+        return self.sentence_cache.stats()
+
+    def _tag_text(self, text: str, text_offset: int, all_tokens_raw: List[Dict]) -> int:
+        if len(text) <= self.segment_max_chars:
+            return self._tag_lattice(text, text_offset, all_tokens_raw)
+
+        # Sentences and gaps reach here unsegmented; a run without sentence
+        # ends still goes to MeCab in pieces so its lattice stays bounded
+        current_position_in_formatted_text = text_offset
+        for piece_start, piece_end in split_into_segments(
+            text, self.segment_target_chars, max_chars=self.segment_max_chars
+        ):
+            current_position_in_formatted_text = self._tag_lattice(
+                text[piece_start:piece_end],
+                current_position_in_formatted_text,
+                all_tokens_raw,
+            )
+        return current_position_in_formatted_text
+
+    def _tag_lattice(
+        self, text: str, text_offset: int, all_tokens_raw: List[Dict]
+    ) -> int:
+        current_position_in_formatted_text = text_offset
+        if not text:
+            return current_position_in_formatted_text
+
+        # Nodes point into the tagger's lattice, so they are read under the
+        # lock as well
+        with self._tagger_lock:
+            for node in self.tagger(text):
                 morph_token_dict = self._create_morph_token_dict_from_node(
-                    node, morph_token_original_char_start
+                    node, current_position_in_formatted_text
                 )
 
                 if node.surface and node.surface.strip():
@@ -552,10 +568,33 @@ class OpenCHJAnnotator:
                     consumed_length_by_morph += len(node.white_space)
 
                 current_position_in_formatted_text += consumed_length_by_morph
-                fugashi_node_idx += 1
 
-        final_tokens_with_chj: List[Dict] = []
-        processed_tokens_count_for_chj = 0
+        return current_position_in_formatted_text
+
+    @staticmethod
+    def _shift_token_positions(tokens: List[Dict], delta: int) -> None:
+        if not delta:
+            return
+        for token in tokens:
+            token["_original_char_start"] += delta
+            token["_original_char_end"] += delta
+
+    def _iter_raw_tokens(
+        self,
+        text_formatted: str,
+        segments: List[Tuple[int, int]],
+        tag_special_patterns: List[Dict],
+    ) -> Iterator[Dict]:
+        position_in_formatted_text = 0
+        for segment_start, segment_end in segments:
+            segment_tokens, position_in_formatted_text = self._tokenize_segment(
+                text_formatted[segment_start:segment_end],
+                position_in_formatted_text,
+                tag_special_patterns,
+            )
+            yield from segment_tokens
+
+    def _iter_chj_positions(self, all_tokens_raw: Iterator[Dict]) -> Iterator[Dict]:
         chj_current_start_position_tracker = self.CHJ_POSITION_MULTIPLIER
 
         for token_dict_raw in all_tokens_raw:
@@ -584,8 +623,25 @@ class OpenCHJAnnotator:
 
             token_dict_raw.setdefault("file_name", "")
             token_dict_raw.setdefault("subcorpus_name", "")
-            final_tokens_with_chj.append(token_dict_raw)
-            processed_tokens_count_for_chj += 1
+            yield token_dict_raw
+
+    @staticmethod
+    def _strip_private_keys(token: Dict, preserve_char_positions: bool) -> Dict:
+        # If preserve_char_positions is True, preserve character positions (for rekion data)
+        if not preserve_char_positions:
+            token.pop("_original_char_start", None)
+            token.pop("_original_char_end", None)
+        token.pop("_is_special_tag", None)
+        return token
+
+    def _finalize_tokens(
+        self,
+        all_tokens_raw: List[Dict],
+        sentence_boundary_settings: Dict,
+        explicit_boundary_positions: Optional[List[int]] = None,
+        preserve_char_positions: bool = False,
+    ) -> List[Dict]:
+        final_tokens_with_chj = list(self._iter_chj_positions(all_tokens_raw))
 
         final_tokens_adjusted_boundary = adjust_sentence_boundaries(
             final_tokens_with_chj,
@@ -593,28 +649,276 @@ class OpenCHJAnnotator:
             explicit_boundary_positions=explicit_boundary_positions,
         )
 
-        # If preserve_char_positions is True, preserve character positions (for rekion data)
-        if not preserve_char_positions:
-            for token in final_tokens_adjusted_boundary:
-                token.pop("_original_char_start", None)
-                token.pop("_original_char_end", None)
-                token.pop("_is_special_tag", None)
-        else:
-            for token in final_tokens_adjusted_boundary:
-                token.pop("_is_special_tag", None)
+        for token in final_tokens_adjusted_boundary:
+            self._strip_private_keys(token, preserve_char_positions)
 
         return final_tokens_adjusted_boundary
 
+    def analyze(
+        self,
+        text: str,
+        temp_format_settings: Optional[Dict] = None,
+        preserve_char_positions: bool = False,
+    ) -> List[Dict]:
+        (
+            text_formatted_for_fugashi,
+            explicit_boundary_positions,
+            current_format_settings,
+            sentence_boundary_settings,
+        ) = self._prepare_text_for_tagging(text, temp_format_settings)
+
+        tag_special_patterns = current_format_settings.get(
+            "tag_special_settings", {}
+        ).get("tag_patterns", [])
+
+        try:
+            segments = self._segment_formatted_text(
+                text_formatted_for_fugashi,
+                current_format_settings,
+                explicit_boundary_positions,
+            )
+            all_tokens_raw = list(
+                self._iter_raw_tokens(
+                    text_formatted_for_fugashi, segments, tag_special_patterns
+                )
+            )
+        except Exception as e:
+            logging.error(f"Fugashi parsing (formatted text) failed: {e}")
+            import traceback
+
+            logging.error(traceback.format_exc())
+            return []
+
+        return self._finalize_tokens(
+            all_tokens_raw,
+            sentence_boundary_settings,
+            explicit_boundary_positions,
+            preserve_char_positions,
+        )
+
+    def analyze_iter(
+        self,
+        text: str,
+        temp_format_settings: Optional[Dict] = None,
+        preserve_char_positions: bool = False,
+    ) -> Iterator[Dict]:
+        # Same records as analyze(), but only one segment's tokens are alive
+        # at a time: CHJ positions and boundaries are resolved as tokens pass.
+        (
+            text_formatted_for_fugashi,
+            explicit_boundary_positions,
+            current_format_settings,
+            sentence_boundary_settings,
+        ) = self._prepare_text_for_tagging(text, temp_format_settings)
+
+        tag_special_patterns = current_format_settings.get(
+            "tag_special_settings", {}
+        ).get("tag_patterns", [])
+        segments = self._segment_formatted_text(
+            text_formatted_for_fugashi,
+            current_format_settings,
+            explicit_boundary_positions,
+        )
+
+        try:
+            raw_tokens = self._iter_raw_tokens(
+                text_formatted_for_fugashi, segments, tag_special_patterns
+            )
+            for token in iter_adjusted_sentence_boundaries(
+                self._iter_chj_positions(raw_tokens),
+                settings=sentence_boundary_settings,
+                explicit_boundary_positions=explicit_boundary_positions,
+            ):
+                yield self._strip_private_keys(token, preserve_char_positions)
+        except Exception as e:
+            logging.error(f"Fugashi parsing (formatted text) failed: {e}")
+            raise
+
+    def analyze_windows(
+        self,
+        windows: Iterable[Tuple[int, str]],
+        temp_format_settings: Optional[Dict] = None,
+    ) -> Iterator[Dict]:
+        # Each (offset, text) window is formatted and tagged on its own, but
+        # positions, CHJ offsets and sentence boundaries run on across them.
+        # Aozora header/footer steps only apply to the first/last window;
+        # a bracket tag or regex match crossing a window edge is not removed.
+        sentence_boundary_settings = self.config.config.get(
+            "sentence_boundary_settings", {}
+        )
+        aozora_cleanup = get_format_settings(self.config, temp_format_settings).get(
+            "aozora_cleanup", False
+        )
+
+        def iter_raw_tokens() -> Iterator[Dict]:
+            formatted_offset = 0
+            window_iter = iter(windows)
+            # One window of lookahead tells whether the current one is last
+            next_window = next(window_iter, None)
+            at_start = True
+            # A marker ending a window belongs to the next window's first token
+            carried_marker = False
+            while next_window is not None:
+                _char_offset, window_text = next_window
+                next_window = next(window_iter, None)
+                # As in the whole text, the window holding the colophon is
+                # the last one analyzed
+                at_end = next_window is None or (
+                    aozora_cleanup and has_colophon(window_text)
+                )
+                (
+                    window_formatted,
+                    explicit_boundary_positions,
+                    current_format_settings,
+                    _window_boundary_settings,
+                ) = self._prepare_text_for_tagging(
+                    window_text,
+                    temp_format_settings,
+                    at_start=at_start,
+                    at_end=at_end,
+                )
+                at_start = False
+                tag_special_patterns = current_format_settings.get(
+                    "tag_special_settings", {}
+                ).get("tag_patterns", [])
+                segments = self._segment_formatted_text(
+                    window_formatted,
+                    current_format_settings,
+                    explicit_boundary_positions,
+                )
+                window_tokens = list(
+                    self._iter_raw_tokens(
+                        window_formatted, segments, tag_special_patterns
+                    )
+                )
+                # Markers are resolved in window coordinates, before the shift
+                marker_positions = list(explicit_boundary_positions or [])
+                if carried_marker:
+                    marker_positions.insert(0, 0)
+                for token_idx in find_explicit_boundary_token_indices(
+                    window_tokens, marker_positions
+                ):
+                    window_tokens[token_idx]["_explicit_boundary"] = True
+                window_end = max(
+                    (token["_original_char_end"] for token in window_tokens),
+                    default=0,
+                )
+                carried_marker = any(
+                    position >= window_end for position in marker_positions
+                )
+                self._shift_token_positions(window_tokens, formatted_offset)
+                formatted_offset += len(window_formatted)
+                yield from window_tokens
+                if at_end:
+                    break
+
+        try:
+            for token in iter_adjusted_sentence_boundaries(
+                self._iter_chj_positions(iter_raw_tokens()),
+                settings=sentence_boundary_settings,
+            ):
+                yield self._strip_private_keys(token, False)
+        except Exception as e:
+            logging.error(f"Fugashi parsing (formatted text) failed: {e}")
+            raise
+
+    def analyze_incremental(
+        self,
+        text: str,
+        temp_format_settings: Optional[Dict] = None,
+        preserve_char_positions: bool = False,
+    ) -> List[Dict]:
+        # Tags sentence by sentence and keeps the tokens of this run, so the
+        # next call only re-tags the sentences that differ from this text.
+        (
+            text_formatted_for_fugashi,
+            explicit_boundary_positions,
+            current_format_settings,
+            sentence_boundary_settings,
+        ) = self._prepare_text_for_tagging(text, temp_format_settings)
+
+        tag_special_patterns = current_format_settings.get(
+            "tag_special_settings", {}
+        ).get("tag_patterns", [])
+        settings_key = json.dumps(
+            current_format_settings, sort_keys=True, ensure_ascii=False, default=str
+        )
+
+        try:
+            sentences = split_into_sentences(
+                text_formatted_for_fugashi,
+                get_tag_matcher(tag_special_patterns).find_spans(
+                    text_formatted_for_fugashi
+                ),
+            )
+            sentence_texts = [
+                text_formatted_for_fugashi[sentence_start:sentence_end]
+                for sentence_start, sentence_end in sentences
+            ]
+            sentence_tokens, retagged_count = update_sentence_tokens(
+                self._incremental_state,
+                settings_key,
+                sentence_texts,
+                lambda sentence_text: self._tokenize_segment(
+                    sentence_text, 0, tag_special_patterns
+                ),
+            )
+        except Exception as e:
+            self._incremental_state = None
+            logging.error(f"Fugashi parsing (formatted text) failed: {e}")
+            import traceback
+
+            logging.error(traceback.format_exc())
+            return []
+
+        self._incremental_state = IncrementalState(
+            settings_key, sentence_texts, sentence_tokens
+        )
+        logging.info(
+            f"Incremental analysis re-tagged {retagged_count} of {len(sentences)} sentences"
+        )
+
+        # Stored records stay untouched; later stages get re-based copies
+        all_tokens_raw: List[Dict] = []
+        for (sentence_start, _sentence_end), (tokens, _consumed_length) in zip(
+            sentences, sentence_tokens
+        ):
+            for token in tokens:
+                token_copy = dict(token)
+                token_copy["_original_char_start"] += sentence_start
+                token_copy["_original_char_end"] += sentence_start
+                all_tokens_raw.append(token_copy)
+
+        return self._finalize_tokens(
+            all_tokens_raw,
+            sentence_boundary_settings,
+            explicit_boundary_positions,
+            preserve_char_positions,
+        )
+
+    def reset_incremental_state(self) -> None:
+        self._incremental_state = None
+
+    def analyze_table(
+        self,
+        text: str,
+        temp_format_settings: Optional[Dict] = None,
+    ) -> TokenTable:
+        return TokenTable.from_tokens(
+            self.analyze_iter(text, temp_format_settings=temp_format_settings)
+        )
+
     def analyze_with_source(
         self,
         text: str,
         source_filename: Optional[str] = None,
         temp_format_settings: Optional[Dict] = None,
-    ) -> Tuple[List[Dict], Optional[str], Optional[List[Dict]]]:
+        incremental: bool = False,
+    ) -> Tuple[List[Dict], Optional[str], Optional[UtteranceIndex]]:
         subcorpus_name = self.config.config.get("subcorpus_name", "")
 
         rekion_pid: Optional[str] = None
-        rekion_utterance_info: Optional[List[Dict]] = None
+        rekion_utterance_info: Optional[UtteranceIndex] = None
         preserve_positions = False
         processed_text = text
 
@@ -626,7 +930,8 @@ class OpenCHJAnnotator:
             processed_text, rekion_utterance_info = preprocess_rekion_text(text)
             preserve_positions = True
 
-        results = self.analyze(
+        analyze_method = self.analyze_incremental if incremental else self.analyze
+        results = analyze_method(
             processed_text,
             temp_format_settings=temp_format_settings,
             preserve_char_positions=preserve_positions,
@@ -637,17 +942,7 @@ class OpenCHJAnnotator:
             and rekion_utterance_info
             and len(rekion_utterance_info) > 0
         ):
-            for token in results:
-                token_char_start = token.get("_original_char_start", 0)
-                utterance_id = find_utterance_id_for_token(
-                    token_char_start, rekion_utterance_info
-                )
-                if not utterance_id:
-                    utterance_id = find_utterance_id_for_token(
-                        token_char_start + 1, rekion_utterance_info
-                    )
-                if utterance_id:
-                    token["_rekion_utterance_id"] = utterance_id
+            results = list(rekion_utterance_info.assign_utterance_ids(results))
 
             for token in results:
                 token.pop("_original_char_start", None)
@@ -655,19 +950,92 @@ class OpenCHJAnnotator:
 
         return results, rekion_pid, rekion_utterance_info
 
+    def analyze_with_source_iter(
+        self,
+        text: str,
+        source_filename: Optional[str] = None,
+        temp_format_settings: Optional[Dict] = None,
+    ) -> Tuple[Iterator[Dict], Optional[str], Optional[UtteranceIndex]]:
+        subcorpus_name = self.config.config.get("subcorpus_name", "")
+
+        rekion_pid: Optional[str] = None
+        rekion_utterance_info: Optional[UtteranceIndex] = None
+        preserve_positions = False
+        processed_text = text
+
+        if is_rekion_data(subcorpus_name):
+            if source_filename:
+                rekion_pid = extract_pid_from_filename(
+                    os.path.basename(source_filename)
+                )
+            processed_text, rekion_utterance_info = preprocess_rekion_text(text)
+            preserve_positions = True
+
+        def iter_tokens() -> Iterator[Dict]:
+            tokens = self.analyze_iter(
+                processed_text,
+                temp_format_settings=temp_format_settings,
+                preserve_char_positions=preserve_positions,
+            )
+            if not rekion_utterance_info:
+                yield from tokens
+                return
+
+            for token in rekion_utterance_info.assign_utterance_ids(tokens):
+                token.pop("_original_char_start", None)
+                token.pop("_original_char_end", None)
+                yield token
+
+        return iter_tokens(), rekion_pid, rekion_utterance_info
+
+    def analyze_file_iter(
+        self,
+        file_path: str,
+        window_threshold: int = LARGE_FILE_THRESHOLD,
+    ) -> Tuple[Iterator[Dict], Optional[str], Optional[UtteranceIndex]]:
+        """
+        Analyze a text file, reading it in windows when it is large.
+
+        Files over window_threshold bytes are memory-mapped and analyzed
+        window by window, so they are never read into one string. Format
+        settings then apply to each window separately. Rekion data needs
+        the whole text for its utterance index and is always read at once.
+
+        Args:
+            file_path: Path of the text file
+            window_threshold: File size in bytes above which to use windows
+
+        Returns:
+            Same as analyze_with_source_iter
+        """
+        subcorpus_name = self.config.config.get("subcorpus_name", "")
+        if (
+            not is_rekion_data(subcorpus_name)
+            and os.path.getsize(file_path) > window_threshold
+        ):
+            windows = TextWindowReader().iter_windows(file_path)
+            return self.analyze_windows(windows), None, None
+
+        return self.analyze_with_source_iter(
+            read_text_file(file_path), source_filename=os.path.basename(file_path)
+        )
+
     def analyze_parallel(
         self,
         text: str,
-        _num_workers: int = None,
+        num_workers: Optional[int] = None,
         temp_format_settings: Optional[Dict] = None,
+        preserve_char_positions: bool = False,
     ) -> List[Dict]:
-        if not self._parallel_warning_shown:
-            logging.warning(
-                "analyze_parallel is using single-threaded analyze due to significant "
-                "changes in the analysis pipeline. Parallel processing needs to be re-evaluated."
-            )
-            self._parallel_warning_shown = True
-        return self.analyze(text, temp_format_settings)
+        from .parallel import analyze_parallel as analyze_parallel_external
+
+        return analyze_parallel_external(
+            text,
+            num_workers,
+            temp_format_settings,
+            annotator_instance=self,
+            preserve_char_positions=preserve_char_positions,
+        )
 
     def preprocess_text_with_tag_info(
         self, text: str, temp_format_settings: Optional[Dict] = None
@@ -695,7 +1063,7 @@ class OpenCHJAnnotator:
             )
 
         text_for_display_formatted = apply_text_formatting_for_display(
-            text_for_processing, current_format_settings, self.jis_mapping
+            text_for_processing, current_format_settings
         )
         if sentence_boundary_settings.get("use_explicit_marker", False):
             text_for_display_formatted, _ = strip_explicit_boundary_markers(
@@ -721,7 +1089,7 @@ class OpenCHJAnnotator:
                 "[B]", explicit_marker_placeholder
             )
         formatted_text = apply_text_formatting_for_display(
-            text_for_processing, current_format_settings, self.jis_mapping
+            text_for_processing, current_format_settings
         )
         if sentence_boundary_settings.get("use_explicit_marker", False):
             formatted_text, _ = strip_explicit_boundary_markers(
@@ -754,6 +1122,27 @@ class OpenCHJAnnotator:
             rekion_utterance_info=rekion_utterance_info,
         )
 
+    def write_as_tsv(
+        self,
+        results: Iterable[Dict],
+        f: BinaryIO,
+        filename: str = "unknown.txt",
+        rekion_pid: str = None,
+        rekion_utterance_info: List[Dict] = None,
+        encoding: str = "utf-8",
+    ) -> int:
+        from .formatter import write_as_tsv as write_tsv_external
+
+        return write_tsv_external(
+            results,
+            f,
+            filename,
+            self.config,
+            rekion_pid=rekion_pid,
+            rekion_utterance_info=rekion_utterance_info,
+            encoding=encoding,
+        )
+
     def format_as_csv(self, results: List[Dict], filename: str = "unknown.txt") -> str:
         from .formatter import format_as_csv as format_csv_external
 
@@ -764,41 +1153,20 @@ class OpenCHJAnnotator:
 
         return format_json_external(results, filename, self.config)
 
+    def format_as_jsonl(
+        self, results: List[Dict], filename: str = "unknown.txt"
+    ) -> str:
+        from .formatter import format_as_jsonl as format_jsonl_external
+
+        return format_jsonl_external(results, filename, self.config)
+
     def analyze_file(self, input_path: str, output_path: str = None) -> str:
         try:
-            text = read_text_file(input_path)
-
-            # Special handling for rekion data (historical audio data)
+            # Large files are read window by window instead of as one string
+            results, rekion_pid, rekion_utterance_info = self.analyze_file_iter(
+                input_path
+            )
             subcorpus_name = self.config.config.get("subcorpus_name", "")
-            rekion_pid = None
-            rekion_utterance_info = []
-
-            if is_rekion_data(subcorpus_name):
-                rekion_pid = extract_pid_from_filename(os.path.basename(input_path))
-                # Preprocess text to get utterance information
-                text, rekion_utterance_info = preprocess_rekion_text(text)
-
-            # For rekion data (historical audio data), preserve character positions
-            preserve_positions = is_rekion_data(subcorpus_name)
-            results = self.analyze(text, preserve_char_positions=preserve_positions)
-
-            # For rekion data (historical audio data), add utteranceId to each token
-            if is_rekion_data(subcorpus_name) and rekion_pid and rekion_utterance_info:
-                for token in results:
-                    token_char_start = token.get("_original_char_start", 0)
-                    utterance_id = find_utterance_id_for_token(
-                        token_char_start, rekion_utterance_info
-                    )
-                    if not utterance_id:
-                        utterance_id = find_utterance_id_for_token(
-                            token_char_start + 1, rekion_utterance_info
-                        )
-                    if utterance_id:
-                        token["_rekion_utterance_id"] = utterance_id
-                # Character position information is no longer needed, so delete it
-                for token in results:
-                    token.pop("_original_char_start", None)
-                    token.pop("_original_char_end", None)
 
             output_settings = self.config.config.get("output_settings", {})
             encoding = "utf-8"
@@ -821,24 +1189,35 @@ class OpenCHJAnnotator:
                 )
                 os.makedirs(output_dir_base, exist_ok=True)
                 base_name = os.path.splitext(os.path.basename(input_path))[0]
+                extension = get_output_extension(self.config)
                 output_path = os.path.join(
-                    output_dir_base, f"{prefix}{base_name}{suffix}.txt"
+                    output_dir_base, f"{prefix}{base_name}{suffix}{extension}"
                 )
 
             os.makedirs(os.path.dirname(output_path), exist_ok=True)
 
-            # For rekion data (historical audio data), pass PID and utterance information
-            if is_rekion_data(subcorpus_name):
-                content = self.format_as_tsv(
-                    results,
-                    os.path.basename(input_path),
-                    rekion_pid=rekion_pid,
-                    rekion_utterance_info=rekion_utterance_info,
-                )
-            else:
-                content = self.format_as_tsv(results, os.path.basename(input_path))
-
-            write_text_file(content, output_path, encoding=encoding)
+            # Rows are encoded as the tokens arrive; "w+b" lets a failed
+            # legacy encoding fall back to UTF-8 for the whole file
+            with open(output_path, "w+b") as f:
+                # For rekion data (historical audio data), pass PID and utterance information
+                if is_rekion_data(subcorpus_name):
+                    write_results(
+                        results,
+                        f,
+                        os.path.basename(input_path),
+                        self.config,
+                        rekion_pid=rekion_pid,
+                        rekion_utterance_info=rekion_utterance_info,
+                        encoding=encoding,
+                    )
+                else:
+                    write_results(
+                        results,
+                        f,
+                        os.path.basename(input_path),
+                        self.config,
+                        encoding=encoding,
+                    )
             return output_path
         except FileNotFoundError:
             logging.error(f"Input file is not found: {input_path}")
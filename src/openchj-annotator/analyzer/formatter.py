@@ -1,19 +1,78 @@
 import json
 import logging
 import os
-from typing import Dict, List, Optional
+from typing import BinaryIO, Dict, Iterable, Iterator, List, Optional
+
+from utils.file_utils import write_text_lines
 
 from .analyzer_utils import csv_escape
 
+# Output format (output_settings.format, lower-cased) -> result file extension
+OUTPUT_EXTENSIONS = {"tsv": ".txt", "csv": ".csv", "jsonl": ".jsonl"}
 
-def format_as_tsv(
-    results: List[Dict],
+JSONL_UNITS = ("token", "sentence")
+
+# Key order and defaults of a JSONL token record, after file_name and
+# subcorpus_name; lexeme defaults to the surface form as in format_as_json
+JSONL_TOKEN_FIELDS = (
+    ("start_position", 0),
+    ("end_position", 0),
+    ("sentence_boundary", "I"),
+    ("surface_form", ""),
+    ("lexeme", None),
+    ("lexeme_reading", ""),
+    ("pos", "不明"),
+    ("conjugation_type", ""),
+    ("conjugation_form", ""),
+    ("pronunciation", ""),
+    ("word_type", ""),
+)
+
+_jsonl_encoder = json.JSONEncoder(ensure_ascii=False, separators=(",", ":"))
+
+
+def get_output_format(config) -> str:
+    output_settings = config.config.get("output_settings", {}) if config else {}
+    output_format = str(output_settings.get("format") or "TSV").lower()
+    if output_format not in OUTPUT_EXTENSIONS:
+        logging.warning(f"Unknown output format '{output_format}', using TSV")
+        return "tsv"
+    return output_format
+
+
+def get_output_extension(config) -> str:
+    return OUTPUT_EXTENSIONS[get_output_format(config)]
+
+
+def get_jsonl_unit(config) -> str:
+    output_settings = config.config.get("output_settings", {}) if config else {}
+    unit = output_settings.get("jsonl_unit") or "token"
+    return unit if unit in JSONL_UNITS else "token"
+
+
+def get_empty_output_text(config) -> str:
+    # TSV and CSV results always end with a newline; JSONL has no blank lines
+    return "" if get_output_format(config) == "jsonl" else "\n"
+
+
+def _get_rekion_file_name(result: Dict, rekion_pid: str, token_idx: int) -> str:
+    # For rekion data (historical audio data), change filename to {PID}_{utteranceId} format
+    # Use utteranceId already set in token
+    utterance_id = result.get("_rekion_utterance_id")
+    if utterance_id:
+        return f"{rekion_pid}_{utterance_id}"
+    # If utteranceId cannot be obtained, use PID only
+    logging.warning(f"[rekion] Token {token_idx} has no utteranceId, using PID only")
+    return rekion_pid
+
+
+def iter_tsv_rows(
+    results: Iterable[Dict],
     filename: str = "unknown.txt",
     config=None,
     rekion_pid: Optional[str] = None,
     rekion_utterance_info: Optional[List[Dict]] = None,
-) -> str:
-    lines = []
+) -> Iterator[str]:
     base_filename = os.path.basename(filename)
     base_filename = os.path.splitext(base_filename)[0]
 
@@ -27,19 +86,8 @@ def format_as_tsv(
         result["file_name"] = base_filename
         result["subcorpus_name"] = "-" if not subcorpus else subcorpus
 
-        # For rekion data (historical audio data), change filename to {PID}_{utteranceId} format
         if is_rekion and rekion_pid:
-            # Use utteranceId already set in token
-            utterance_id = result.get("_rekion_utterance_id")
-
-            if utterance_id:
-                result["file_name"] = f"{rekion_pid}_{utterance_id}"
-            else:
-                # If utteranceId cannot be obtained, use PID only
-                result["file_name"] = rekion_pid
-                logging.warning(
-                    f"[rekion] Token {token_idx} has no utteranceId, using PID only"
-                )
+            result["file_name"] = _get_rekion_file_name(result, rekion_pid, token_idx)
 
         row = [
             result.get("file_name", base_filename),
@@ -56,15 +104,67 @@ def format_as_tsv(
             result.get("pronunciation", ""),
             result.get("word_type", ""),
         ]
-        lines.append("\t".join(map(str, row)))
+        yield "\t".join(map(str, row))
 
+
+def format_as_tsv(
+    results: Iterable[Dict],
+    filename: str = "unknown.txt",
+    config=None,
+    rekion_pid: Optional[str] = None,
+    rekion_utterance_info: Optional[List[Dict]] = None,
+) -> str:
+    lines = iter_tsv_rows(
+        results,
+        filename,
+        config,
+        rekion_pid=rekion_pid,
+        rekion_utterance_info=rekion_utterance_info,
+    )
     return "\n".join(lines) + "\n"
 
 
-def format_as_csv(
-    results: List[Dict], filename: str = "unknown.txt", config=None
-) -> str:
-    output_rows = []
+def write_as_tsv(
+    results: Iterable[Dict],
+    f: BinaryIO,
+    filename: str = "unknown.txt",
+    config=None,
+    rekion_pid: Optional[str] = None,
+    rekion_utterance_info: Optional[List[Dict]] = None,
+    encoding: str = "utf-8",
+) -> int:
+    """
+    Stream the TSV rows of results to an open binary file.
+
+    Writes the same bytes as encoding format_as_tsv's string, but rows
+    are encoded as they are produced, so neither the tokens nor the
+    output have to be held whole.
+
+    Args:
+        results: Tokens, consumed once
+        f: File opened with "w+b" (see write_text_lines)
+        filename: Input file name shown in the first column
+        config: Config for the subcorpus name
+        rekion_pid: PID of rekion data
+        rekion_utterance_info: Utterance index of rekion data
+        encoding: Output encoding
+
+    Returns:
+        Number of rows written
+    """
+    rows = iter_tsv_rows(
+        results,
+        filename,
+        config,
+        rekion_pid=rekion_pid,
+        rekion_utterance_info=rekion_utterance_info,
+    )
+    return write_text_lines(rows, f, encoding, empty_text="\n")
+
+
+def iter_csv_rows(
+    results: Iterable[Dict], filename: str = "unknown.txt", config=None
+) -> Iterator[str]:
     base_filename = os.path.basename(filename)
     base_filename = os.path.splitext(base_filename)[0]
 
@@ -102,13 +202,29 @@ def format_as_csv(
             else:
                 row_values.append(result.get(field, ""))
 
-        output_rows.append(",".join([csv_escape(cell) for cell in row_values]))
+        yield ",".join([csv_escape(cell) for cell in row_values])
+
 
-    return "\n".join(output_rows) + "\n"
+def format_as_csv(
+    results: Iterable[Dict], filename: str = "unknown.txt", config=None
+) -> str:
+    return "\n".join(iter_csv_rows(results, filename, config)) + "\n"
+
+
+def write_as_csv(
+    results: Iterable[Dict],
+    f: BinaryIO,
+    filename: str = "unknown.txt",
+    config=None,
+    encoding: str = "utf-8",
+) -> int:
+    """Stream the CSV rows of results to f; see write_as_tsv."""
+    rows = iter_csv_rows(results, filename, config)
+    return write_text_lines(rows, f, encoding, empty_text="\n")
 
 
 def format_as_json(
-    results: List[Dict], filename: str = "unknown.txt", config=None
+    results: Iterable[Dict], filename: str = "unknown.txt", config=None
 ) -> str:
     base_filename = os.path.basename(filename)
     base_filename = os.path.splitext(base_filename)[0]
@@ -138,3 +254,126 @@ def format_as_json(
 
     json_str = json.dumps(output_data, ensure_ascii=False, indent=2)
     return json_str.replace("\r\n", "\n") + "\n"
+
+
+def _jsonl_token_record(result: Dict) -> Dict:
+    record = {
+        field: result.get(field, default) for field, default in JSONL_TOKEN_FIELDS
+    }
+    if record["lexeme"] is None:
+        record["lexeme"] = record["surface_form"]
+    return record
+
+
+def iter_jsonl_rows(
+    results: Iterable[Dict],
+    filename: str = "unknown.txt",
+    config=None,
+    rekion_pid: Optional[str] = None,
+    unit: str = "token",
+) -> Iterator[str]:
+    """
+    Serialize results as JSON Lines, one token or one sentence per line.
+
+    Token lines hold file_name, subcorpus_name and the JSONL_TOKEN_FIELDS
+    in that order. Sentence lines hold file_name, subcorpus_name,
+    sentence_index and the records of their tokens, starting a new
+    sentence at every "B" boundary. Unlike format_as_json, the token
+    dicts are left unchanged.
+
+    Args:
+        results: Tokens, consumed once
+        filename: Input file name; its stem becomes file_name
+        config: Config for the subcorpus name
+        rekion_pid: PID of rekion data
+        unit: "token" or "sentence"
+
+    Yields:
+        One compact JSON object per line, without the newline
+    """
+    base_filename = os.path.splitext(os.path.basename(filename))[0]
+    subcorpus = config.config.get("subcorpus_name", "") if config else ""
+    subcorpus_name = subcorpus or "-"
+    is_rekion = subcorpus == "歴史的音源"
+
+    sentence: Optional[Dict] = None
+    sentence_index = 0
+    for token_idx, result in enumerate(results):
+        file_name = base_filename
+        if is_rekion and rekion_pid:
+            file_name = _get_rekion_file_name(result, rekion_pid, token_idx)
+
+        if unit != "sentence":
+            line = {"file_name": file_name, "subcorpus_name": subcorpus_name}
+            line.update(_jsonl_token_record(result))
+            yield _jsonl_encoder.encode(line)
+            continue
+
+        if sentence is None or result.get("sentence_boundary", "I") == "B":
+            if sentence is not None:
+                yield _jsonl_encoder.encode(sentence)
+            sentence = {
+                "file_name": file_name,
+                "subcorpus_name": subcorpus_name,
+                "sentence_index": sentence_index,
+                "tokens": [],
+            }
+            sentence_index += 1
+        sentence["tokens"].append(_jsonl_token_record(result))
+
+    if sentence is not None:
+        yield _jsonl_encoder.encode(sentence)
+
+
+def format_as_jsonl(
+    results: Iterable[Dict], filename: str = "unknown.txt", config=None
+) -> str:
+    rows = iter_jsonl_rows(results, filename, config, unit=get_jsonl_unit(config))
+    return "".join(f"{row}\n" for row in rows)
+
+
+def iter_output_rows(
+    results: Iterable[Dict],
+    filename: str = "unknown.txt",
+    config=None,
+    rekion_pid: Optional[str] = None,
+    rekion_utterance_info: Optional[List[Dict]] = None,
+) -> Iterator[str]:
+    """Rows of results in the format selected by output_settings.format."""
+    output_format = get_output_format(config)
+    if output_format == "csv":
+        return iter_csv_rows(results, filename, config)
+    if output_format == "jsonl":
+        return iter_jsonl_rows(
+            results, filename, config, rekion_pid, unit=get_jsonl_unit(config)
+        )
+    return iter_tsv_rows(
+        results,
+        filename,
+        config,
+        rekion_pid=rekion_pid,
+        rekion_utterance_info=rekion_utterance_info,
+    )
+
+
+def write_results(
+    results: Iterable[Dict],
+    f: BinaryIO,
+    filename: str = "unknown.txt",
+    config=None,
+    rekion_pid: Optional[str] = None,
+    rekion_utterance_info: Optional[List[Dict]] = None,
+    encoding: str = "utf-8",
+) -> int:
+    """Stream results to f in the configured format; see write_as_tsv."""
+    if get_output_format(config) == "jsonl":
+        # JSON text is always UTF-8
+        encoding = "utf-8"
+    rows = iter_output_rows(
+        results,
+        filename,
+        config,
+        rekion_pid=rekion_pid,
+        rekion_utterance_info=rekion_utterance_info,
+    )
+    return write_text_lines(rows, f, encoding, get_empty_output_text(config))
@@ -0,0 +1,57 @@
+from typing import Callable, Dict, List, Optional, Sequence, Tuple
+
+# (tokens positioned from the sentence start, characters consumed by the tagger)
+SentenceTokens = Tuple[List[Dict], int]
+
+
+class IncrementalState:
+    def __init__(
+        self,
+        settings_key: str,
+        sentence_texts: List[str],
+        sentence_tokens: List[SentenceTokens],
+    ):
+        self.settings_key = settings_key
+        self.sentence_texts = sentence_texts
+        self.sentence_tokens = sentence_tokens
+
+
+def diff_sentences(
+    old_texts: Sequence[str], new_texts: Sequence[str]
+) -> Tuple[int, int]:
+    max_common = min(len(old_texts), len(new_texts))
+
+    prefix_len = 0
+    while prefix_len < max_common and old_texts[prefix_len] == new_texts[prefix_len]:
+        prefix_len += 1
+
+    suffix_len = 0
+    while (
+        suffix_len < max_common - prefix_len
+        and old_texts[-1 - suffix_len] == new_texts[-1 - suffix_len]
+    ):
+        suffix_len += 1
+
+    return prefix_len, suffix_len
+
+
+def update_sentence_tokens(
+    previous_state: Optional[IncrementalState],
+    settings_key: str,
+    sentence_texts: List[str],
+    tokenize_sentence: Callable[[str], SentenceTokens],
+) -> Tuple[List[SentenceTokens], int]:
+    if previous_state is None or previous_state.settings_key != settings_key:
+        return [tokenize_sentence(text) for text in sentence_texts], len(sentence_texts)
+
+    prefix_len, suffix_len = diff_sentences(
+        previous_state.sentence_texts, sentence_texts
+    )
+    old_tokens = previous_state.sentence_tokens
+    changed_texts = sentence_texts[prefix_len : len(sentence_texts) - suffix_len]
+
+    sentence_tokens = old_tokens[:prefix_len]
+    sentence_tokens.extend(tokenize_sentence(text) for text in changed_texts)
+    if suffix_len:
+        sentence_tokens.extend(old_tokens[len(old_tokens) - suffix_len :])
+    return sentence_tokens, len(changed_texts)
@@ -1,18 +1,118 @@
 import logging
-from typing import Dict, List, Optional
+import multiprocessing
+import os
+from concurrent.futures import ProcessPoolExecutor
+from typing import Dict, List, Optional, Tuple
+
+_worker_annotator = None
+
+
+def get_pool_context():
+    # forkserver children start from a clean, single-threaded server that
+    # already imported the analyzer, so the GUI's Qt threads are never
+    # forked; spawn is the only choice on Windows
+    if "forkserver" in multiprocessing.get_all_start_methods():
+        context = multiprocessing.get_context("forkserver")
+        context.set_forkserver_preload(["analyzer.core"])
+        return context
+    return multiprocessing.get_context("spawn")
+
+
+def _initialize_shard_worker(config) -> None:
+    global _worker_annotator
+    from .core import OpenCHJAnnotator
+
+    _worker_annotator = OpenCHJAnnotator(config)
+
+
+def _tokenize_shard(shard: Tuple[str, int, List[Dict]]) -> Tuple[List[Dict], int]:
+    shard_text, shard_offset, tag_special_patterns = shard
+    return _worker_annotator._tokenize_segment(
+        shard_text, shard_offset, tag_special_patterns
+    )
 
 
 def analyze_parallel(
     text: str,
-    _num_workers: int = None,  # This variable is not used in the current implementation
+    num_workers: Optional[int] = None,
     temp_format_settings: Optional[Dict] = None,
     annotator_instance=None,
+    preserve_char_positions: bool = False,
 ) -> List[Dict]:
-    logging.warning()
-    if annotator_instance:
-        return annotator_instance.analyze(text, temp_format_settings)
-    else:
+    if not annotator_instance:
         logging.error(
             "analyze_parallel: Annotator instance not provided. Cannot perform analysis."
         )
         return []
+
+    (
+        text_formatted_for_fugashi,
+        explicit_boundary_positions,
+        current_format_settings,
+        sentence_boundary_settings,
+    ) = annotator_instance._prepare_text_for_tagging(text, temp_format_settings)
+
+    tag_special_patterns = current_format_settings.get("tag_special_settings", {}).get(
+        "tag_patterns", []
+    )
+
+    # The serial path tags exactly the same segments, so both paths produce
+    # identical positions, boundaries and special tags.
+    segments = annotator_instance._segment_formatted_text(
+        text_formatted_for_fugashi,
+        current_format_settings,
+        explicit_boundary_positions,
+    )
+    num_workers = min(num_workers or os.cpu_count() or 1, len(segments))
+
+    all_tokens_raw: List[Dict] = []
+    position_in_formatted_text = 0
+    try:
+        if num_workers <= 1:
+            for segment_start, segment_end in segments:
+                shard_tokens, position_in_formatted_text = (
+                    annotator_instance._tokenize_segment(
+                        text_formatted_for_fugashi[segment_start:segment_end],
+                        position_in_formatted_text,
+                        tag_special_patterns,
+                    )
+                )
+                all_tokens_raw.extend(shard_tokens)
+        else:
+            shards = (
+                (
+                    text_formatted_for_fugashi[segment_start:segment_end],
+                    segment_start,
+                    tag_special_patterns,
+                )
+                for segment_start, segment_end in segments
+            )
+            with ProcessPoolExecutor(
+                max_workers=num_workers,
+                mp_context=get_pool_context(),
+                initializer=_initialize_shard_worker,
+                initargs=(annotator_instance.config,),
+            ) as executor:
+                for (segment_start, _segment_end), (
+                    shard_tokens,
+                    shard_position_end,
+                ) in zip(segments, executor.map(_tokenize_shard, shards)):
+                    # Workers count from the shard offset; carry the position
+                    # the serial tracker would have reached instead.
+                    delta = position_in_formatted_text - segment_start
+                    annotator_instance._shift_token_positions(shard_tokens, delta)
+                    position_in_formatted_text = shard_position_end + delta
+                    all_tokens_raw.extend(shard_tokens)
+    except Exception as e:
+        logging.error(f"Parallel fugashi parsing (formatted text) failed: {e}")
+        import traceback
+
+        logging.error(traceback.format_exc())
+        return []
+
+    return annotator_instance._finalize_tokens(
+        all_tokens_raw,
+        sentence_boundary_settings,
+        explicit_boundary_positions,
+        preserve_char_positions,
+    )
@@ -1,52 +1,25 @@
+import json
 import logging
 import re
-from typing import Dict, Optional
+from functools import lru_cache
+from typing import Dict, List, Optional, Tuple
 
-from .analyzer_utils import jis_to_unicode
+from .aozora import get_aozora_cleaner
 
 
 def process_aozora_annotations_for_display(
-    text: str, jis_mapping: Dict[str, str]
+    text: str, jis_mapping: Optional[Dict[str, str]] = None
 ) -> str:
-    processed_text = text
-
-    def replace_jis_character_in_note(match):
-        note_content = match.group(0)
-        jis_code_search = re.search(r"(第\d水準\d+-\d+-\d+)", note_content)
-        if jis_code_search:
-            jis_code_str = jis_code_search.group(1)
-            unicode_char = jis_to_unicode(jis_code_str, jis_mapping)
-            if unicode_char:
-                return unicode_char
-        return ""
-
-    processed_text = re.sub(
-        r"※?［＃[^］]*?(第\d水準\d+-\d+-\d+)[^］]*?］",
-        replace_jis_character_in_note,
-        processed_text,
-    )
-    processed_text = re.sub(
-        r"([^｜《》]+?)｜([^｜《》]+?)《[^《》]*?》", r"\1\2", processed_text
-    )
-    processed_text = re.sub(r"《[^《》]*?》", "", processed_text)
-    processed_text = re.sub(r"［＃[^］]*?］", "", processed_text)
-    processed_text = re.sub(r"〔.*?〕", "", processed_text)
-
-    return processed_text
+    return get_aozora_cleaner(jis_mapping).strip_annotations(text)
 
 
-def aozora_cleanup_for_display(text: str, jis_mapping: Dict[str, str]) -> str:
-    cleaned_text = text
-    parts = re.split(r"^-{5,}.*?-{5,}$", cleaned_text, flags=re.MULTILINE)
-    if len(parts) >= 3:
-        cleaned_text = parts[0].rstrip() + "\n\n" + parts[2].lstrip()
-    elif len(parts) == 2 and parts[0].strip() == "":
-        cleaned_text = parts[1].lstrip()
-    elif len(parts) == 2 and parts[1].strip() == "":
-        cleaned_text = parts[0].rstrip()
-    cleaned_text = re.split(r"^底本：", cleaned_text, maxsplit=1, flags=re.MULTILINE)[0]
-    cleaned_text = process_aozora_annotations_for_display(cleaned_text, jis_mapping)
-    return cleaned_text.strip()
+def aozora_cleanup_for_display(
+    text: str,
+    jis_mapping: Optional[Dict[str, str]] = None,
+    at_start: bool = True,
+    at_end: bool = True,
+) -> str:
+    return get_aozora_cleaner(jis_mapping).cleanup(text, at_start, at_end)
 
 
 def get_format_settings(config, temp_format_settings: Optional[Dict] = None) -> Dict:
@@ -95,20 +68,182 @@ def get_format_settings(config, temp_format_settings: Optional[Dict] = None) ->
     return settings
 
 
-def apply_text_formatting_for_display(
-    text: str,
-    format_settings: Dict,
-    jis_mapping: Dict[str, str],
-) -> str:
-    formatted_text = text
+UI_KEY_TO_SPECIAL_BRACKET_TYPE = {
+    "<>": "angle",
+    "()": "round",
+    "[]": "square",
+    "{}": "curly",
+    "＜＞": "angle_full",
+    "（）": "round_full",
+    "［］": "square_full",
+    "｛｝": "curly_full",
+    "【】": "corner",
+    "《》": "double_angle_ja",
+}
+
+BRACKET_MAP_INTERNAL = {
+    "<>": ("<", ">"),
+    "()": ("(", ")"),
+    "[]": ("[", "]"),
+    "{}": ("{", "}"),
+    "【】": ("【", "】"),
+    "《》": ("《", "》"),
+    "＜＞": ("＜", "＞"),
+    "（）": ("（", "）"),
+    "［］": ("［", "］"),
+    "｛｝": ("｛", "｝"),
+    "〈〉": ("〈", "〉"),
+}
+
+MAX_CACHED_FORMAT_PLANS = 32
+
+
+def _is_literal_rule(pattern_str: str, replacement: str) -> bool:
+    return re.escape(pattern_str) == pattern_str and "\\" not in replacement
+
+
+def _can_merge_literal_rule(
+    merged_rules: List[Tuple[str, str]], pattern_str: str
+) -> bool:
+    # A merged alternation replaces in one pass, which only equals applying
+    # the rules in turn when no rule can see or create another rule's match
+    pattern_chars = set(pattern_str)
+    for earlier_pattern, earlier_replacement in merged_rules:
+        if pattern_chars & set(earlier_pattern):
+            return False
+        if pattern_chars & set(earlier_replacement):
+            return False
+        if not earlier_replacement and len(pattern_str) > 1:
+            return False
+    return True
+
+
+class LiteralReplacementGroup:
+    def __init__(self, rules: List[Tuple[str, str]]):
+        self.replacements = dict(rules)
+        self.regex = re.compile(
+            "|".join(re.escape(pattern_str) for pattern_str, _ in rules)
+        )
+
+    def sub(self, text: str) -> str:
+        replacements = self.replacements
+        return self.regex.sub(lambda match: replacements[match.group(0)], text)
+
+
+class BracketRemover:
+    """
+    Removes bracket tags of all enabled types.
+
+    Brackets of another type nested inside a kept tag are removed too:
+
+    >>> BracketRemover([("（", "）"), ("[", "]")], "remove_tags_only").apply(
+    ...     "本文（注[1]）です"
+    ... )
+    '本文注1です'
+    """
+
+    def __init__(
+        self, bracket_pairs: List[Tuple[str, str]], mode: str, nested: bool = False
+    ):
+        self.mode = mode
+        self.nested = nested
+        self.close_for_open = dict(bracket_pairs)
+        if nested:
+            self.regex = re.compile(
+                "|".join(
+                    re.escape(bracket)
+                    for bracket_pair in bracket_pairs
+                    for bracket in bracket_pair
+                )
+            )
+        else:
+            # One alternation finds the leftmost tag of any enabled type, so
+            # the text is scanned once whatever the number of bracket types
+            self.regex = re.compile(
+                "|".join(
+                    f"{re.escape(b_open)}.*?{re.escape(b_close)}"
+                    for b_open, b_close in bracket_pairs
+                ),
+                re.DOTALL,
+            )
+
+    def _strip_brackets(self, match_obj) -> str:
+        content_with_tags = match_obj.group(0)
+        b_open = content_with_tags[0]
+        b_close = self.close_for_open[b_open]
+        if len(content_with_tags) > len(b_open) + len(b_close):
+            # The kept content may hold properly nested tags of another type
+            return self.regex.sub(
+                self._strip_brackets, content_with_tags[len(b_open) : -len(b_close)]
+            )
+        return ""
+
+    def apply(self, text: str) -> str:
+        if self.nested:
+            return self._apply_nested(text)
+        if self.mode == "remove_with_content":
+            return self.regex.sub("", text)
+        if self.mode == "remove_tags_only":
+            return self.regex.sub(self._strip_brackets, text)
+        return text
+
+    def _apply_nested(self, text: str) -> str:
+        # Unmatched brackets are kept as ordinary characters
+        open_stack: List[Tuple[int, str]] = []
+        matched_pairs: List[Tuple[int, int]] = []
+        for match in self.regex.finditer(text):
+            bracket = match.group(0)
+            position = match.start()
+            expected_close = self.close_for_open.get(bracket)
+            if expected_close is not None:
+                open_stack.append((position, expected_close))
+            elif open_stack and open_stack[-1][1] == bracket:
+                open_position, _expected_close = open_stack.pop()
+                matched_pairs.append((open_position, position))
+
+        removed_spans: List[Tuple[int, int]] = []
+        if self.mode == "remove_with_content":
+            # Pairs nest properly, so only the outermost ones need removing
+            for open_position, close_position in sorted(matched_pairs):
+                if removed_spans and open_position < removed_spans[-1][1]:
+                    continue
+                removed_spans.append((open_position, close_position + 1))
+        elif self.mode == "remove_tags_only":
+            for open_position, close_position in matched_pairs:
+                removed_spans.append((open_position, open_position + 1))
+                removed_spans.append((close_position, close_position + 1))
+            removed_spans.sort()
+
+        if not removed_spans:
+            return text
+
+        parts = []
+        kept_start = 0
+        for span_start, span_end in removed_spans:
+            parts.append(text[kept_start:span_start])
+            kept_start = span_end
+        parts.append(text[kept_start:])
+        return "".join(parts)
+
+
+class FormatPlan:
+    def __init__(self, format_settings: Dict):
+        self.aozora_cleanup = bool(format_settings.get("aozora_cleanup", False))
+        self.bracket_remover: Optional[BracketRemover] = None
+        self.whitespace_table: Optional[Dict[int, None]] = None
+        # Precompiled regexes and merged literal groups, in rule order
+        self.replacement_steps: List[Tuple[object, str]] = []
+
+        self._compile_tag_removal(format_settings)
+        self._compile_whitespace_removal(format_settings.get("output_settings", {}))
+        self._compile_regex_rules(format_settings.get("regex_settings", {}))
 
-    if format_settings.get("aozora_cleanup", False):
-        formatted_text = aozora_cleanup_for_display(formatted_text, jis_mapping)
+    def _compile_tag_removal(self, format_settings: Dict) -> None:
+        tag_s = format_settings.get("tag_settings", {})
+        if not tag_s.get("enabled", False):
+            return
 
-    tag_s = format_settings.get("tag_settings", {})
-    if tag_s.get("enabled", False):
         types_to_remove_from_ui = set(tag_s.get("types", []))
-        mode = tag_s.get("mode", "remove_with_content")
 
         special_tag_patterns_config = format_settings.get(
             "tag_special_settings", {}
@@ -119,100 +254,130 @@ def apply_text_formatting_for_display(
             if p.get("bracket_type")
         }
 
-        ui_key_to_special_bracket_type_map = {
-            "<>": "angle",
-            "()": "round",
-            "[]": "square",
-            "{}": "curly",
-            "＜＞": "angle_full",
-            "（）": "round_full",
-            "［］": "square_full",
-            "｛｝": "curly_full",
-            "【】": "corner",
-            "《》": "double_angle_ja",
-        }
-
-        types_to_actually_remove = set()
         for ui_tag_key in types_to_remove_from_ui:
-            corresponding_special_type = ui_key_to_special_bracket_type_map.get(
-                ui_tag_key
-            )
+            if ui_tag_key not in BRACKET_MAP_INTERNAL:
+                logging.warning(f"Unknown tag type for general removal: {ui_tag_key}")
+
+        bracket_pairs: List[Tuple[str, str]] = []
+        for ui_tag_key, bracket_pair in BRACKET_MAP_INTERNAL.items():
+            if ui_tag_key not in types_to_remove_from_ui:
+                continue
+            corresponding_special_type = UI_KEY_TO_SPECIAL_BRACKET_TYPE.get(ui_tag_key)
             if (
                 corresponding_special_type
                 and corresponding_special_type in special_bracket_types_used_in_special
             ):
                 continue
-            types_to_actually_remove.add(ui_tag_key)
-
-        bracket_map_internal = {
-            "<>": ("<", ">"),
-            "()": ("(", ")"),
-            "[]": ("[", "]"),
-            "{}": ("{", "}"),
-            "【】": ("【", "】"),
-            "《》": ("《", "》"),
-            "＜＞": ("＜", "＞"),
-            "（）": ("（", "）"),
-            "［］": ("［", "］"),
-            "｛｝": ("｛", "｝"),
-            "〈〉": ("〈", "〉"),
-        }
+            bracket_pairs.append(bracket_pair)
 
-        for tag_type_key_to_remove in types_to_actually_remove:
-            b_open, b_close = bracket_map_internal.get(
-                tag_type_key_to_remove, (None, None)
+        if bracket_pairs:
+            self.bracket_remover = BracketRemover(
+                bracket_pairs,
+                tag_s.get("mode", "remove_with_content"),
+                nested=tag_s.get("nested", False),
             )
-            if b_open and b_close:
-                try:
-                    pattern_str_tag = f"{re.escape(b_open)}.*?{re.escape(b_close)}"
-                    if mode == "remove_with_content":
-                        formatted_text = re.sub(
-                            pattern_str_tag, "", formatted_text, flags=re.DOTALL
-                        )
-                    elif mode == "remove_tags_only":
-
-                        def repl_tags_only_local(match_obj):
-                            content_with_tags = match_obj.group(0)
-                            if len(content_with_tags) > len(b_open) + len(b_close):
-                                return content_with_tags[len(b_open) : -len(b_close)]
-                            return ""
-
-                        formatted_text = re.sub(
-                            pattern_str_tag,
-                            repl_tags_only_local,
-                            formatted_text,
-                            flags=re.DOTALL,
-                        )
-                except re.error as e:
-                    logging.warning(
-                        f"Error removing general tag ({tag_type_key_to_remove}): {e}"
-                    )
-            else:
-                logging.warning(
-                    f"Unknown tag type for general removal: {tag_type_key_to_remove}"
-                )
 
-    output_s = format_settings.get("output_settings", {})
-    if output_s.get("remove_full_space", False):
-        formatted_text = formatted_text.replace("　", "")
-    if output_s.get("remove_half_space", False):
-        formatted_text = formatted_text.replace(" ", "")
-    if output_s.get("remove_newline", False):
-        formatted_text = (
-            formatted_text.replace("\r\n", "").replace("\n", "").replace("\r", "")
-        )
+    def _compile_whitespace_removal(self, output_s: Dict) -> None:
+        removed_chars = ""
+        if output_s.get("remove_full_space", False):
+            removed_chars += "　"
+        if output_s.get("remove_half_space", False):
+            removed_chars += " "
+        if output_s.get("remove_newline", False):
+            removed_chars += "\r\n"
+        if removed_chars:
+            self.whitespace_table = str.maketrans("", "", removed_chars)
 
-    regex_s = format_settings.get("regex_settings", {})
-    if regex_s.get("enabled", False):
+    def _compile_regex_rules(self, regex_s: Dict) -> None:
+        if not regex_s.get("enabled", False):
+            return
+
+        literal_rules: List[Tuple[str, str]] = []
         for pattern_data in regex_s.get("patterns", []):
             pattern_str = pattern_data.get("pattern")
             replacement = pattern_data.get("replacement", "")
-            if pattern_str:
-                try:
-                    formatted_text = re.sub(pattern_str, replacement, formatted_text)
-                except re.error as e:
-                    logging.warning(
-                        f"Error applying regex: {pattern_str} -> {replacement}. Error: {e}"
-                    )
-
-    return formatted_text
+            if not pattern_str:
+                continue
+
+            if _is_literal_rule(pattern_str, replacement):
+                if not _can_merge_literal_rule(literal_rules, pattern_str):
+                    self._flush_literal_rules(literal_rules)
+                    literal_rules = []
+                literal_rules.append((pattern_str, replacement))
+                continue
+
+            try:
+                compiled_pattern = re.compile(pattern_str)
+                # Validate group references in the replacement up front
+                compiled_pattern.sub(replacement, "")
+            except re.error as e:
+                logging.warning(
+                    f"Error applying regex: {pattern_str} -> {replacement}. Error: {e}"
+                )
+                continue
+            self._flush_literal_rules(literal_rules)
+            literal_rules = []
+            self.replacement_steps.append((compiled_pattern, replacement))
+
+        self._flush_literal_rules(literal_rules)
+
+    def _flush_literal_rules(self, literal_rules: List[Tuple[str, str]]) -> None:
+        if len(literal_rules) == 1:
+            pattern_str, replacement = literal_rules[0]
+            self.replacement_steps.append((re.compile(pattern_str), replacement))
+        elif literal_rules:
+            self.replacement_steps.append(
+                (LiteralReplacementGroup(literal_rules), None)
+            )
+
+    def apply(
+        self,
+        text: str,
+        jis_mapping: Optional[Dict[str, str]] = None,
+        at_start: bool = True,
+        at_end: bool = True,
+    ) -> str:
+        formatted_text = text
+
+        if self.aozora_cleanup:
+            formatted_text = aozora_cleanup_for_display(
+                formatted_text, jis_mapping, at_start, at_end
+            )
+
+        if self.bracket_remover is not None:
+            formatted_text = self.bracket_remover.apply(formatted_text)
+
+        if self.whitespace_table:
+            formatted_text = formatted_text.translate(self.whitespace_table)
+
+        for step, replacement in self.replacement_steps:
+            if replacement is None:
+                formatted_text = step.sub(formatted_text)
+            else:
+                formatted_text = step.sub(replacement, formatted_text)
+
+        return formatted_text
+
+
+@lru_cache(maxsize=MAX_CACHED_FORMAT_PLANS)
+def _compile_format_plan(settings_key: str) -> FormatPlan:
+    return FormatPlan(json.loads(settings_key))
+
+
+def get_format_plan(format_settings: Dict) -> FormatPlan:
+    # Keyed by the settings themselves, so a changed Config simply misses
+    try:
+        settings_key = json.dumps(format_settings, sort_keys=True, ensure_ascii=False)
+    except (TypeError, ValueError):
+        return FormatPlan(format_settings)
+    return _compile_format_plan(settings_key)
+
+
+def apply_text_formatting_for_display(
+    text: str,
+    format_settings: Dict,
+    jis_mapping: Optional[Dict[str, str]] = None,
+    at_start: bool = True,
+    at_end: bool = True,
+) -> str:
+    return get_format_plan(format_settings).apply(text, jis_mapping, at_start, at_end)
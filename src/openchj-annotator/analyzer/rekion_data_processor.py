@@ -11,8 +11,11 @@ Processing:
 4. Generate output filename: {PID}_{utteranceId}
 """
 
+import bisect
 import re
-from typing import Dict, List, Optional, Tuple
+from array import array
+from collections.abc import Sequence
+from typing import Dict, Iterable, Iterator, List, Optional, Tuple
 
 
 def extract_pid_from_filename(filename: str) -> Optional[str]:
@@ -59,7 +62,90 @@ def parse_rekion_line(line: str) -> Tuple[Optional[str], Optional[str], str]:
     return None, None, line
 
 
-def preprocess_rekion_text(text: str) -> Tuple[str, List[Dict[str, str]]]:
+class UtteranceIndex(Sequence):
+    """
+    Utterance info list with sorted offset arrays for position lookups.
+
+    Behaves like the list of utterance info dicts it wraps, and keeps the
+    charStart/charEnd offsets in parallel arrays so tokens can be matched to
+    utterances by bisection or by a single sweep in token order.
+    """
+
+    def __init__(self, utterance_info_list: Optional[List[Dict]] = None):
+        self.utterances = list(utterance_info_list or [])
+        self.starts = array("q", (info.get("charStart", 0) for info in self.utterances))
+        self.ends = array("q", (info.get("charEnd", 0) for info in self.utterances))
+        self.ids = [info["utteranceId"] for info in self.utterances]
+
+    def __getitem__(self, index):
+        return self.utterances[index]
+
+    def __len__(self) -> int:
+        return len(self.utterances)
+
+    def __eq__(self, other) -> bool:
+        if isinstance(other, UtteranceIndex):
+            return self.utterances == other.utterances
+        return self.utterances == other
+
+    def __repr__(self) -> str:
+        return f"UtteranceIndex({self.utterances!r})"
+
+    def _advance_past(self, position: int, index: int) -> int:
+        while index < len(self.ends) and self.ends[index] <= position:
+            index += 1
+        return index
+
+    def _id_at(self, position: int, index: int) -> Optional[str]:
+        if index < len(self.starts) and self.starts[index] <= position:
+            return self.ids[index]
+        return None
+
+    def find(self, position: int) -> Optional[str]:
+        """
+        Find utteranceId whose character range contains the position.
+
+        Args:
+            position: Character position in preprocessed text
+
+        Returns:
+            Corresponding utteranceId, or None if not found
+        """
+        return self._id_at(position, bisect.bisect_right(self.ends, position))
+
+    def assign_utterance_ids(self, tokens: Iterable[Dict]) -> Iterator[Dict]:
+        """
+        Attach utteranceIds to tokens in one sweep over the utterances.
+
+        A token that falls just before an utterance (e.g. on leading
+        whitespace) is matched using the following character.
+
+        Args:
+            tokens: Tokens carrying _original_char_start, in text order
+
+        Yields:
+            Each token, with _rekion_utterance_id set when an utterance matches
+        """
+        index = 0
+        for token in tokens:
+            token_char_start = token.get("_original_char_start", 0)
+            if index and token_char_start < self.ends[index - 1]:
+                # Out-of-order token; restart the sweep from its position
+                index = bisect.bisect_right(self.ends, token_char_start)
+            index = self._advance_past(token_char_start, index)
+
+            utterance_id = self._id_at(token_char_start, index)
+            if not utterance_id:
+                utterance_id = self._id_at(
+                    token_char_start + 1,
+                    self._advance_past(token_char_start + 1, index),
+                )
+            if utterance_id:
+                token["_rekion_utterance_id"] = utterance_id
+            yield token
+
+
+def preprocess_rekion_text(text: str) -> Tuple[str, UtteranceIndex]:
     """
     Preprocess entire historical recording text.
 
@@ -67,7 +153,7 @@ def preprocess_rekion_text(text: str) -> Tuple[str, List[Dict[str, str]]]:
         text: Full input text
 
     Returns:
-        Tuple of (processed text, list of utterance info)
+        Tuple of (processed text, UtteranceIndex of utterance info)
         Utterance info format: [{"utteranceId": "U00001", "speakerId": "R001",
                                  "originalLineIndex": 0, "charStart": 0, "charEnd": 50}, ...]
     """
@@ -105,7 +191,7 @@ def preprocess_rekion_text(text: str) -> Tuple[str, List[Dict[str, str]]]:
             current_char_pos += len(line) + 1
 
     processed_text = "\n".join(processed_lines)
-    return processed_text, utterance_info_list
+    return processed_text, UtteranceIndex(utterance_info_list)
 
 
 def find_utterance_id_for_token(
@@ -121,6 +207,9 @@ def find_utterance_id_for_token(
     Returns:
         Corresponding utteranceId, or None if not found
     """
+    if isinstance(utterance_info_list, UtteranceIndex):
+        return utterance_info_list.find(token_char_start)
+
     for info in utterance_info_list:
         char_start = info.get("charStart", 0)
         char_end = info.get("charEnd", 0)
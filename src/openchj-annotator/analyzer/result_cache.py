@@ -0,0 +1,142 @@
+import hashlib
+import logging
+import os
+import shutil
+from typing import Dict, List, Optional, Tuple
+
+# Bump when the formatted output changes for identical input and settings
+RESULT_SCHEMA_VERSION = 1
+
+DEFAULT_MAX_CACHE_SIZE_MB = 2048
+
+RESULT_CACHE_DIRNAME = "results"
+
+
+def get_default_result_cache_dir() -> str:
+    from utils.file_utils import get_app_config_dir
+
+    return str(get_app_config_dir() / "cache" / RESULT_CACHE_DIRNAME)
+
+
+def _place_file(source_path: str, target_path: str) -> None:
+    # Hard link when possible; both sides are only ever replaced by
+    # rename, never rewritten in place, so sharing the inode is safe
+    if os.path.exists(target_path) and os.path.samefile(source_path, target_path):
+        # rename() is a no-op between links to one file and would leave
+        # the temporary link behind
+        return
+    os.makedirs(os.path.dirname(os.path.abspath(target_path)), exist_ok=True)
+    temp_path = f"{target_path}.{os.getpid()}.tmp"
+    try:
+        os.link(source_path, temp_path)
+    except OSError:
+        shutil.copyfile(source_path, temp_path)
+    os.replace(temp_path, target_path)
+
+
+class ResultCache:
+    """
+    Content-addressed store of formatted batch results.
+
+    Entries are keyed by the input bytes, the input file name (it appears
+    in the output), the dictionary fingerprint, the annotation settings
+    and RESULT_SCHEMA_VERSION, so a hit can be reused without tagging.
+    """
+
+    def __init__(
+        self,
+        directory: str,
+        namespace: str = "",
+        max_size_mb: int = DEFAULT_MAX_CACHE_SIZE_MB,
+    ):
+        self.directory = directory
+        self.namespace = namespace
+        self.max_bytes = max_size_mb * 1024 * 1024
+
+    @classmethod
+    def for_config(cls, config) -> Optional["ResultCache"]:
+        cache_settings = config.config.get("result_cache", {})
+        if not cache_settings.get("enabled", False):
+            return None
+        from .batch_manifest import compute_dictionary_key, compute_settings_hash
+
+        namespace = "\0".join(
+            (
+                str(RESULT_SCHEMA_VERSION),
+                compute_dictionary_key(config),
+                compute_settings_hash(config),
+            )
+        )
+        return cls(
+            cache_settings.get("directory") or get_default_result_cache_dir(),
+            namespace,
+            cache_settings.get("max_size_mb", DEFAULT_MAX_CACHE_SIZE_MB),
+        )
+
+    def key(self, content_hash: str, filename: str) -> str:
+        material = "\0".join((self.namespace, content_hash, filename))
+        return hashlib.sha256(material.encode("utf-8")).hexdigest()
+
+    def _entry_path(self, key: str) -> str:
+        return os.path.join(self.directory, key[:2], key[2:])
+
+    def fetch(self, key: str, output_path: str) -> bool:
+        entry_path = self._entry_path(key)
+        if not os.path.isfile(entry_path):
+            return False
+        try:
+            _place_file(entry_path, output_path)
+            # The mtime doubles as the last use for eviction
+            os.utime(entry_path)
+        except OSError as e:
+            logging.warning(f"Could not reuse cached result {entry_path}: {e}")
+            return False
+        return True
+
+    def store(self, key: str, result_path: str) -> None:
+        try:
+            _place_file(result_path, self._entry_path(key))
+        except OSError as e:
+            logging.warning(f"Could not cache result {result_path}: {e}")
+
+    def _list_entries(self) -> List[Tuple[float, int, str]]:
+        entries = []
+        if not os.path.isdir(self.directory):
+            return entries
+        for shard in os.scandir(self.directory):
+            if not shard.is_dir():
+                continue
+            for entry in os.scandir(shard.path):
+                if entry.is_file() and not entry.name.endswith(".tmp"):
+                    stat_result = entry.stat()
+                    entries.append(
+                        (stat_result.st_mtime, stat_result.st_size, entry.path)
+                    )
+        return entries
+
+    def stats(self) -> Dict:
+        entries = self._list_entries()
+        return {
+            "directory": self.directory,
+            "entries": len(entries),
+            "size_bytes": sum(size for _mtime, size, _path in entries),
+            "max_size_bytes": self.max_bytes,
+        }
+
+    def prune(self, max_bytes: Optional[int] = None) -> int:
+        """Evict least recently used entries until the cache fits max_bytes."""
+        limit = self.max_bytes if max_bytes is None else max_bytes
+        entries = self._list_entries()
+        total_bytes = sum(size for _mtime, size, _path in entries)
+        removed = 0
+        for _mtime, size, path in sorted(entries):
+            if total_bytes <= limit:
+                break
+            try:
+                os.remove(path)
+            except OSError as e:
+                logging.warning(f"Could not evict cached result {path}: {e}")
+                continue
+            total_bytes -= size
+            removed += 1
+        return removed
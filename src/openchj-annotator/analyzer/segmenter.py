@@ -0,0 +1,246 @@
+import bisect
+import re
+from typing import List, Optional, Sequence, Tuple
+
+SEGMENT_TARGET_CHARS = 100 * 1024
+
+# Upper bound on the text MeCab gets in one call, whatever the punctuation
+SEGMENT_MAX_CHARS = 200 * 1024
+
+SENTENCE_FINAL_CHARS = "。．！？"
+
+# Characters MeCab (UniDic char.def SPACE) folds into a node's white_space
+MECAB_WHITESPACE_CHARS = " \t\n\x0b"
+
+# Sentence-final runs end a sentence; a newline (with the blanks around it)
+# ends one at its first blank, so the blanks lead the next sentence
+SENTENCE_CUT_PATTERN = re.compile(r"[。．！？]+|[ \t\x0b]*\n[ \t\n\x0b]*")
+
+# Fallback cuts for runs without any sentence end or newline: after a
+# comma or blank, else where a kanji or katakana run follows hiragana
+SOFT_BREAK_CHARS = "、，,　 "
+SCRIPT_CHANGE_PATTERN = re.compile(r"(?<=[ぁ-ゖ])[々〆ヵヶ一-鿿ァ-ヺ]")
+
+
+def _is_inside_span(
+    position: int, span_starts: Sequence[int], spans: Sequence[Tuple[int, int]]
+) -> bool:
+    span_idx = bisect.bisect_right(span_starts, position) - 1
+    if span_idx < 0:
+        return False
+    span_start, span_end = spans[span_idx]
+    return span_start < position < span_end
+
+
+def _settle_cut(text: str, cut: int, segment_start: int) -> int:
+    # A segment must end on a character MeCab consumes, so trailing
+    # whitespace is handed over to the next segment as leading white_space.
+    while cut > segment_start and text[cut - 1] in MECAB_WHITESPACE_CHARS:
+        cut -= 1
+    return cut
+
+
+def _find_cut_backward(
+    text: str,
+    segment_start: int,
+    limit: int,
+    span_starts: Sequence[int],
+    spans: Sequence[Tuple[int, int]],
+    boundary_positions: Sequence[int] = (),
+) -> int:
+    search_end = limit
+    while search_end > segment_start:
+        sentence_cut = max(
+            text.rfind(ch, segment_start, search_end) for ch in SENTENCE_FINAL_CHARS
+        )
+        sentence_cut = sentence_cut + 1 if sentence_cut != -1 else -1
+        newline_cut = text.rfind("\n", segment_start + 1, search_end)
+        if newline_cut != -1:
+            newline_cut = _settle_cut(text, newline_cut, segment_start)
+        marker_cut = -1
+        marker_idx = bisect.bisect_left(boundary_positions, search_end) - 1
+        if marker_idx >= 0 and boundary_positions[marker_idx] > segment_start:
+            marker_cut = _settle_cut(
+                text, boundary_positions[marker_idx], segment_start
+            )
+
+        cut = max(sentence_cut, newline_cut, marker_cut)
+        if cut <= segment_start:
+            return -1
+        if not _is_inside_span(cut, span_starts, spans):
+            return cut
+        search_end = cut - 1
+    return -1
+
+
+def _find_cut_forward(
+    text: str,
+    segment_start: int,
+    origin: int,
+    span_starts: Sequence[int],
+    spans: Sequence[Tuple[int, int]],
+    boundary_positions: Sequence[int] = (),
+    search_limit: Optional[int] = None,
+) -> int:
+    search_start = origin
+    search_end = len(text) if search_limit is None else min(search_limit, len(text))
+    text_len = len(text)
+    while search_start < search_end:
+        # (position of the break character, cut position)
+        candidates = [
+            (pos, pos + 1)
+            for pos in (
+                text.find(ch, search_start, search_end) for ch in SENTENCE_FINAL_CHARS
+            )
+            if pos != -1
+        ]
+        newline_pos = text.find("\n", search_start, search_end)
+        if newline_pos != -1:
+            candidates.append(
+                (newline_pos, _settle_cut(text, newline_pos, segment_start))
+            )
+        marker_idx = bisect.bisect_left(boundary_positions, search_start)
+        if (
+            marker_idx < len(boundary_positions)
+            and boundary_positions[marker_idx] < search_end
+        ):
+            marker_pos = boundary_positions[marker_idx]
+            candidates.append(
+                (marker_pos, _settle_cut(text, marker_pos, segment_start))
+            )
+        if not candidates:
+            return -1
+
+        break_pos, cut = min(candidates)
+        if segment_start < cut < text_len and not _is_inside_span(
+            cut, span_starts, spans
+        ):
+            return cut
+        search_start = break_pos + 1
+    return -1
+
+
+def _find_fallback_cut(
+    text: str,
+    segment_start: int,
+    limit: int,
+    span_starts: Sequence[int],
+    spans: Sequence[Tuple[int, int]],
+) -> int:
+    # Only the later half is searched so a fallback segment stays long
+    search_start = segment_start + (limit - segment_start) // 2
+    cut = max(text.rfind(ch, search_start, limit) for ch in SOFT_BREAK_CHARS) + 1
+    if cut <= search_start:
+        script_changes = list(SCRIPT_CHANGE_PATTERN.finditer(text, search_start, limit))
+        cut = script_changes[-1].start() if script_changes else limit
+
+    if _is_inside_span(cut, span_starts, spans):
+        span_start, span_end = spans[bisect.bisect_right(span_starts, cut) - 1]
+        cut = span_start if span_start > segment_start else span_end
+
+    settled_cut = _settle_cut(text, cut, segment_start)
+    if settled_cut > segment_start:
+        return settled_cut
+    # Only blanks before the cut: hand them all to this segment instead
+    while cut < len(text) and text[cut] in MECAB_WHITESPACE_CHARS:
+        cut += 1
+    return cut
+
+
+def split_into_segments(
+    text: str,
+    target_chars: int = SEGMENT_TARGET_CHARS,
+    protected_spans: Optional[List[Tuple[int, int]]] = None,
+    max_chars: Optional[int] = None,
+    boundary_positions: Optional[Sequence[int]] = None,
+) -> List[Tuple[int, int]]:
+    """
+    Split text into (start, end) ranges cut at sentence ends or newlines.
+
+    Cuts never fall inside a protected span and never leave MeCab
+    whitespace at the end of a segment, so tagging the segments one by one
+    reproduces the character positions of tagging the whole text. A run
+    longer than max_chars without a sentence end, newline or explicit
+    boundary is cut after a comma or blank, at a change of script, or
+    failing those at max_chars.
+
+    Args:
+        text: Formatted text that will be passed to the tagger
+        target_chars: Preferred maximum segment length
+        protected_spans: Sorted (start, end) ranges that must not be split
+        max_chars: Hard maximum segment length (default: 2 * target_chars);
+            only a protected span longer than this can exceed it
+        boundary_positions: Explicit sentence boundary positions, which
+            are cut candidates like sentence ends
+
+    Returns:
+        Contiguous list of (start, end) ranges covering the whole text
+    """
+    if not text:
+        return []
+
+    max_chars = max(max_chars or 2 * target_chars, target_chars)
+    spans = sorted(protected_spans or [])
+    span_starts = [span[0] for span in spans]
+    positions = sorted(set(boundary_positions or []))
+    text_len = len(text)
+    segments: List[Tuple[int, int]] = []
+    segment_start = 0
+
+    while text_len - segment_start > target_chars:
+        limit = segment_start + target_chars
+        hard_limit = segment_start + max_chars
+        cut = _find_cut_backward(
+            text, segment_start, limit, span_starts, spans, positions
+        )
+        if cut == -1:
+            cut = _find_cut_forward(
+                text, segment_start, limit, span_starts, spans, positions, hard_limit
+            )
+        if cut == -1:
+            if text_len <= hard_limit:
+                break
+            cut = _find_fallback_cut(
+                text, segment_start, hard_limit, span_starts, spans
+            )
+            if cut >= text_len:
+                break
+        segments.append((segment_start, cut))
+        segment_start = cut
+
+    segments.append((segment_start, text_len))
+    return segments
+
+
+def split_into_sentences(
+    text: str, protected_spans: Optional[List[Tuple[int, int]]] = None
+) -> List[Tuple[int, int]]:
+    """
+    Split text into contiguous (start, end) sentence ranges.
+
+    Like split_into_segments, no range ends on MeCab whitespace, so the
+    ranges can be tagged one by one without losing character positions.
+
+    Args:
+        text: Formatted text that will be passed to the tagger
+        protected_spans: Sorted (start, end) ranges that must not be split
+
+    Returns:
+        Contiguous list of (start, end) ranges covering the whole text
+    """
+    spans = sorted(protected_spans or [])
+    span_starts = [span[0] for span in spans]
+    sentences: List[Tuple[int, int]] = []
+    sentence_start = 0
+    for match in SENTENCE_CUT_PATTERN.finditer(text):
+        cut = (
+            match.end() if match.group(0)[0] in SENTENCE_FINAL_CHARS else match.start()
+        )
+        if sentence_start < cut < len(text) and not _is_inside_span(
+            cut, span_starts, spans
+        ):
+            sentences.append((sentence_start, cut))
+            sentence_start = cut
+    if sentence_start < len(text):
+        sentences.append((sentence_start, len(text)))
+    return sentences
@@ -1,5 +1,5 @@
 import re
-from typing import Dict, List, Optional, Tuple
+from typing import Dict, Iterable, Iterator, List, Optional, Tuple
 
 DEFAULT_SENTENCE_BOUNDARY_SETTINGS = {
     "end_punct": "。",
@@ -68,23 +68,15 @@ def split_sentences(text: str) -> List[str]:
     return [s for s in sentences if s]
 
 
-def adjust_sentence_boundaries(
-    tokens: List[Dict],
-    settings: Optional[Dict] = None,
-    explicit_boundary_positions: Optional[List[int]] = None,
+def mark_punctuation_boundaries(
+    tokens: List[Dict], settings: Optional[Dict] = None
 ) -> List[Dict]:
-    if not tokens:
-        return tokens
-
     end_punct_set, end_quote_set = _get_boundary_settings(settings)
 
     for token_idx, token in enumerate(tokens):
         token["sentence_boundary"] = "I" if token_idx > 0 else "B"
         token.setdefault("surface_form", "")
 
-    if len(tokens) <= 1:
-        return tokens
-
     for i in range(len(tokens) - 1):
         current_token_surface = tokens[i]["surface_form"]
         next_token_surface = tokens[i + 1]["surface_form"]
@@ -99,19 +91,109 @@ def adjust_sentence_boundaries(
         elif current_token_surface in end_quote_set:
             tokens[i + 1]["sentence_boundary"] = "B"
 
-    if explicit_boundary_positions:
-        explicit_boundary_positions = sorted(set(explicit_boundary_positions))
-        for boundary_pos in explicit_boundary_positions:
-            for token in tokens:
-                token_start = token.get("_original_char_start")
-                token_end = token.get("_original_char_end")
-                if token_start is None or token_end is None:
-                    continue
-                if token_start <= boundary_pos < token_end:
-                    token["sentence_boundary"] = "B"
-                    break
-                if boundary_pos < token_start:
-                    token["sentence_boundary"] = "B"
-                    break
+    return tokens
+
+
+def find_explicit_boundary_token_indices(
+    tokens: List[Dict], explicit_boundary_positions: Optional[List[int]]
+) -> List[int]:
+    if not explicit_boundary_positions:
+        return []
+
+    positions = sorted(set(explicit_boundary_positions))
+    token_indices: List[int] = []
+    position_idx = 0
+    furthest_end = None
 
+    # A marker belongs to the first token ending after it. Positions are
+    # sorted, so one pass over the running maximum of token ends pairs them.
+    for token_idx, token in enumerate(tokens):
+        if position_idx >= len(positions):
+            break
+        token_start = token.get("_original_char_start")
+        token_end = token.get("_original_char_end")
+        if token_start is None or token_end is None:
+            continue
+        if furthest_end is None or token_end > furthest_end:
+            furthest_end = token_end
+        if positions[position_idx] < furthest_end:
+            token_indices.append(token_idx)
+            while (
+                position_idx < len(positions) and positions[position_idx] < furthest_end
+            ):
+                position_idx += 1
+
+    return token_indices
+
+
+def mark_explicit_boundaries(
+    tokens: List[Dict], explicit_boundary_positions: Optional[List[int]]
+) -> List[Dict]:
+    for token_idx in find_explicit_boundary_token_indices(
+        tokens, explicit_boundary_positions
+    ):
+        tokens[token_idx]["sentence_boundary"] = "B"
     return tokens
+
+
+def adjust_sentence_boundaries(
+    tokens: List[Dict],
+    settings: Optional[Dict] = None,
+    explicit_boundary_positions: Optional[List[int]] = None,
+) -> List[Dict]:
+    if not tokens:
+        return tokens
+
+    mark_punctuation_boundaries(tokens, settings)
+    if len(tokens) <= 1:
+        return tokens
+
+    return mark_explicit_boundaries(tokens, explicit_boundary_positions)
+
+
+def iter_adjusted_sentence_boundaries(
+    tokens: Iterable[Dict],
+    settings: Optional[Dict] = None,
+    explicit_boundary_positions: Optional[List[int]] = None,
+) -> Iterator[Dict]:
+    end_punct_set, end_quote_set = _get_boundary_settings(settings)
+    pending_positions = sorted(set(explicit_boundary_positions or []))
+    position_idx = 0
+    prev_surface = None
+    prev2_surface = None
+
+    # A token's boundary depends only on itself and the two tokens before it,
+    # so each token can be yielded as soon as it arrives.
+    for token_idx, token in enumerate(tokens):
+        surface = token.setdefault("surface_form", "")
+        boundary = "I" if token_idx > 0 else "B"
+
+        if prev2_surface in end_punct_set and prev_surface in end_quote_set:
+            boundary = "B"
+        if prev_surface in end_punct_set:
+            boundary = "I" if surface in end_quote_set else "B"
+        elif prev_surface in end_quote_set:
+            boundary = "B"
+
+        # Set by callers that resolve markers themselves, window by window
+        if token.pop("_explicit_boundary", False):
+            boundary = "B"
+
+        token_end = token.get("_original_char_end")
+        if (
+            position_idx < len(pending_positions)
+            and token.get("_original_char_start") is not None
+            and token_end is not None
+            and pending_positions[position_idx] < token_end
+        ):
+            boundary = "B"
+            while (
+                position_idx < len(pending_positions)
+                and pending_positions[position_idx] < token_end
+            ):
+                position_idx += 1
+
+        token["sentence_boundary"] = boundary
+        prev2_surface = prev_surface
+        prev_surface = surface
+        yield token
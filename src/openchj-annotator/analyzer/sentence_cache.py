@@ -0,0 +1,51 @@
+import threading
+from collections import OrderedDict
+from typing import Dict, List, Optional, Tuple
+
+DEFAULT_MAX_CACHED_SENTENCES = 20000
+
+
+class SentenceCache:
+    def __init__(self, max_size: int = DEFAULT_MAX_CACHED_SENTENCES):
+        self.max_size = max_size
+        self.hits = 0
+        self.misses = 0
+        # key -> (tokens positioned from 0, characters consumed by the tagger)
+        self._entries: "OrderedDict[Tuple, Tuple[List[Dict], int]]" = OrderedDict()
+        self._lock = threading.Lock()
+
+    def get(self, key: Tuple) -> Optional[Tuple[List[Dict], int]]:
+        with self._lock:
+            entry = self._entries.get(key)
+            if entry is None:
+                self.misses += 1
+                return None
+            self._entries.move_to_end(key)
+            self.hits += 1
+            return entry
+
+    def put(self, key: Tuple, tokens: List[Dict], consumed_length: int) -> None:
+        if self.max_size <= 0:
+            return
+        with self._lock:
+            self._entries[key] = (tokens, consumed_length)
+            self._entries.move_to_end(key)
+            while len(self._entries) > self.max_size:
+                self._entries.popitem(last=False)
+
+    def clear(self) -> None:
+        with self._lock:
+            self._entries.clear()
+            self.hits = 0
+            self.misses = 0
+
+    def stats(self) -> Dict[str, int]:
+        return {
+            "hits": self.hits,
+            "misses": self.misses,
+            "size": len(self._entries),
+            "max_size": self.max_size,
+        }
+
+    def __len__(self) -> int:
+        return len(self._entries)
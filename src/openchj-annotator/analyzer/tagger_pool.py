@@ -0,0 +1,117 @@
+import logging
+import os
+import threading
+from collections import OrderedDict
+from typing import Callable, Dict, Optional, Tuple
+
+DEFAULT_MAX_POOLED_TAGGERS = 4
+
+# Files whose replacement means a cached Tagger no longer matches the dictionary
+DICTIONARY_FILES = ("sys.dic", "matrix.bin", "matrix.def", "char.bin", "unk.dic")
+
+
+def _file_signature(path: str) -> Tuple:
+    try:
+        stat_result = os.stat(path)
+        return (path, stat_result.st_mtime_ns, stat_result.st_size)
+    except OSError:
+        return (path, None, None)
+
+
+def _resolve_dictionary_dir(dict_path: Optional[str]) -> Optional[str]:
+    if not dict_path or dict_path == "bundled":
+        return None
+    if os.path.isdir(dict_path):
+        return dict_path
+    return os.path.dirname(dict_path)
+
+
+def dictionary_fingerprint(
+    dict_path: Optional[str] = None, user_dict_path: Optional[str] = None
+) -> Tuple:
+    fingerprint = []
+    dict_dir = _resolve_dictionary_dir(dict_path)
+    if dict_dir:
+        for dictionary_file in DICTIONARY_FILES:
+            fingerprint.append(_file_signature(os.path.join(dict_dir, dictionary_file)))
+    else:
+        fingerprint.append(("bundled",))
+    if user_dict_path:
+        fingerprint.append(_file_signature(user_dict_path))
+    return tuple(fingerprint)
+
+
+def config_dictionary_fingerprint(config) -> Tuple:
+    active_dict = config.get_active_dictionary()
+    dict_path = config.get_unidic_path(active_dict)
+    user_dict_path = (
+        None if active_dict == "lite" else config.get_user_dictionary_path()
+    )
+    if active_dict == "lite":
+        dict_path = None
+    if user_dict_path and not os.path.exists(user_dict_path):
+        user_dict_path = None
+    return (active_dict,) + dictionary_fingerprint(dict_path, user_dict_path)
+
+
+class TaggerPool:
+    def __init__(self, max_size: int = DEFAULT_MAX_POOLED_TAGGERS):
+        self.max_size = max_size
+        self._taggers: "OrderedDict[Tuple, object]" = OrderedDict()
+        self._tagger_locks: Dict[Tuple, threading.Lock] = {}
+        self._lock = threading.Lock()
+
+    def get(
+        self,
+        options: str,
+        factory: Callable[[str], object],
+        dict_path: Optional[str] = None,
+        user_dict_path: Optional[str] = None,
+    ):
+        key = (options, dictionary_fingerprint(dict_path, user_dict_path))
+        with self._lock:
+            tagger = self._taggers.get(key)
+            if tagger is not None:
+                self._taggers.move_to_end(key)
+                return tagger
+
+        # Build outside the lock; a failing factory leaves the pool untouched
+        tagger = factory(options)
+
+        with self._lock:
+            existing_tagger = self._taggers.get(key)
+            if existing_tagger is not None:
+                # Another thread built one first; share that one and its lock
+                self._taggers.move_to_end(key)
+                return existing_tagger
+            self._taggers[key] = tagger
+            self._tagger_locks[key] = threading.Lock()
+            while len(self._taggers) > self.max_size:
+                evicted_key, _evicted = self._taggers.popitem(last=False)
+                self._tagger_locks.pop(evicted_key, None)
+                logging.info(f"Evicted idle tagger from pool: {evicted_key[0]}")
+        return tagger
+
+    def lock_for(self, tagger) -> threading.Lock:
+        """Lock to hold while using tagger, shared by all users of it."""
+        with self._lock:
+            for key, pooled_tagger in self._taggers.items():
+                if pooled_tagger is tagger:
+                    return self._tagger_locks[key]
+        # A tagger built outside the pool is not shared
+        return threading.Lock()
+
+    def clear(self) -> None:
+        with self._lock:
+            self._taggers.clear()
+            self._tagger_locks.clear()
+
+    def __len__(self) -> int:
+        return len(self._taggers)
+
+
+_tagger_pool = TaggerPool()
+
+
+def get_tagger_pool() -> TaggerPool:
+    return _tagger_pool
@@ -0,0 +1,212 @@
+from array import array
+from collections.abc import Mapping
+from typing import Dict, Iterable, Iterator, List, Optional
+
+TOKEN_FIELDS = [
+    "file_name",
+    "subcorpus_name",
+    "start_position",
+    "end_position",
+    "sentence_boundary",
+    "surface_form",
+    "lexeme",
+    "lexeme_reading",
+    "pos",
+    "conjugation_type",
+    "conjugation_form",
+    "pronunciation",
+    "word_type",
+]
+
+STRING_FIELDS = [
+    "file_name",
+    "subcorpus_name",
+    "surface_form",
+    "lexeme",
+    "lexeme_reading",
+    "pos",
+    "conjugation_type",
+    "conjugation_form",
+    "pronunciation",
+    "word_type",
+    "_rekion_utterance_id",
+]
+
+# Key order of the dicts built by OpenCHJAnnotator, so formatter output
+# (notably JSON) is identical whether it reads dicts or a TokenTable
+RECORD_FIELD_ORDER = [
+    "surface_form",
+    "lexeme",
+    "lexeme_reading",
+    "pos",
+    "conjugation_type",
+    "conjugation_form",
+    "pronunciation",
+    "word_type",
+    "sentence_boundary",
+    "start_position",
+    "end_position",
+    "file_name",
+    "subcorpus_name",
+]
+
+FIELD_DEFAULTS = {"pos": "不明"}
+
+
+class StringTable:
+    def __init__(self):
+        self.strings: List[str] = [""]
+        self._ids: Dict[str, int] = {"": 0}
+
+    def intern(self, value: str) -> int:
+        string_id = self._ids.get(value)
+        if string_id is None:
+            string_id = len(self.strings)
+            self._ids[value] = string_id
+            self.strings.append(value)
+        return string_id
+
+    def __getitem__(self, string_id: int) -> str:
+        return self.strings[string_id]
+
+    def __len__(self) -> int:
+        return len(self.strings)
+
+
+class TokenRow(Mapping):
+    __slots__ = ("_table", "_index")
+
+    def __init__(self, table: "TokenTable", index: int):
+        self._table = table
+        self._index = index
+
+    def __getitem__(self, field: str):
+        return self._table.value(self._index, field)
+
+    def __iter__(self) -> Iterator[str]:
+        return iter(TOKEN_FIELDS)
+
+    def __len__(self) -> int:
+        return len(TOKEN_FIELDS)
+
+    def to_dict(self) -> Dict:
+        return self._table.row_dict(self._index)
+
+    def __repr__(self) -> str:
+        return f"TokenRow({self.to_dict()!r})"
+
+
+class TokenTable:
+    def __init__(self):
+        self.strings = StringTable()
+        self.start_positions = array("q")
+        self.end_positions = array("q")
+        # 1 = sentence start ("B"), 0 = inside ("I")
+        self.sentence_starts = array("b")
+        self.string_columns: Dict[str, array] = {
+            field: array("I") for field in STRING_FIELDS
+        }
+
+    @classmethod
+    def from_tokens(cls, tokens: Iterable[Dict]) -> "TokenTable":
+        table = cls()
+        table.extend(tokens)
+        return table
+
+    def append(self, token: Dict) -> None:
+        self.start_positions.append(token.get("start_position", 0))
+        self.end_positions.append(token.get("end_position", 0))
+        self.sentence_starts.append(
+            1 if token.get("sentence_boundary", "I") == "B" else 0
+        )
+        intern = self.strings.intern
+        for field, column in self.string_columns.items():
+            value = token.get(field, FIELD_DEFAULTS.get(field, ""))
+            column.append(intern(value if isinstance(value, str) else str(value)))
+
+    def extend(self, tokens: Iterable[Dict]) -> None:
+        for token in tokens:
+            self.append(token)
+
+    def __len__(self) -> int:
+        return len(self.start_positions)
+
+    def __getitem__(self, index: int) -> TokenRow:
+        if index < 0:
+            index += len(self)
+        if not 0 <= index < len(self):
+            raise IndexError("TokenTable index out of range")
+        return TokenRow(self, index)
+
+    def __iter__(self) -> Iterator[TokenRow]:
+        for index in range(len(self)):
+            yield TokenRow(self, index)
+
+    def value(self, index: int, field: str):
+        if field == "start_position":
+            return self.start_positions[index]
+        if field == "end_position":
+            return self.end_positions[index]
+        if field == "sentence_boundary":
+            return "B" if self.sentence_starts[index] else "I"
+        column = self.string_columns.get(field)
+        if column is None:
+            raise KeyError(field)
+        return self.strings[column[index]]
+
+    def row_dict(self, index: int) -> Dict:
+        row = {field: self.value(index, field) for field in RECORD_FIELD_ORDER}
+        utterance_id = self.value(index, "_rekion_utterance_id")
+        if utterance_id:
+            row["_rekion_utterance_id"] = utterance_id
+        return row
+
+    def iter_dicts(self) -> Iterator[Dict]:
+        for index in range(len(self)):
+            yield self.row_dict(index)
+
+    def column(self, field: str) -> List:
+        if field == "start_position":
+            return self.start_positions.tolist()
+        if field == "end_position":
+            return self.end_positions.tolist()
+        if field == "sentence_boundary":
+            return ["B" if flag else "I" for flag in self.sentence_starts]
+        strings = self.strings.strings
+        return [strings[string_id] for string_id in self.string_columns[field]]
+
+    def as_numpy(self, field: str):
+        import numpy as np
+
+        if field == "start_position":
+            return np.frombuffer(self.start_positions, dtype=np.int64)
+        if field == "end_position":
+            return np.frombuffer(self.end_positions, dtype=np.int64)
+        if field == "sentence_boundary":
+            return np.frombuffer(self.sentence_starts, dtype=np.int8)
+        return np.frombuffer(self.string_columns[field], dtype=np.uint32)
+
+    def to_tsv(
+        self,
+        filename: str = "unknown.txt",
+        config=None,
+        rekion_pid: Optional[str] = None,
+    ) -> str:
+        from .formatter import format_as_tsv
+
+        return format_as_tsv(self.iter_dicts(), filename, config, rekion_pid=rekion_pid)
+
+    def to_csv(self, filename: str = "unknown.txt", config=None) -> str:
+        from .formatter import format_as_csv
+
+        return format_as_csv(self.iter_dicts(), filename, config)
+
+    def to_json(self, filename: str = "unknown.txt", config=None) -> str:
+        from .formatter import format_as_json
+
+        return format_as_json(self.iter_dicts(), filename, config)
+
+    def to_jsonl(self, filename: str = "unknown.txt", config=None) -> str:
+        from .formatter import format_as_jsonl
+
+        return format_as_jsonl(self.iter_dicts(), filename, config)
@@ -0,0 +1,227 @@
+import argparse
+import logging
+import os
+import sys
+from typing import List, Optional, Tuple
+
+from analyzer.batch import (
+    build_output_path,
+    collect_input_files,
+    get_output_affixes,
+    iter_batch_results,
+)
+from analyzer.batch_manifest import MANIFEST_FILENAME, BatchManifest
+from analyzer.formatter import JSONL_UNITS, OUTPUT_EXTENSIONS, get_output_extension
+from analyzer.result_cache import (
+    DEFAULT_MAX_CACHE_SIZE_MB,
+    ResultCache,
+    get_default_result_cache_dir,
+)
+from utils import path_manager
+from utils.file_utils import format_file_size
+
+from config import Config
+
+
+def build_parser() -> argparse.ArgumentParser:
+    parser = argparse.ArgumentParser(
+        prog="openchj-annotator",
+        description="Annotate text files with OpenCHJ Annotator without the GUI.",
+    )
+    parser.add_argument(
+        "inputs", nargs="+", help="input .txt files, directories or glob patterns"
+    )
+    parser.add_argument(
+        "-o", "--output-dir", required=True, help="directory for the results"
+    )
+    parser.add_argument(
+        "-f",
+        "--format",
+        choices=sorted(OUTPUT_EXTENSIONS),
+        help="result format (default: output_settings.format of the config)",
+    )
+    parser.add_argument(
+        "--jsonl-unit",
+        choices=JSONL_UNITS,
+        help="write one token or one sentence per JSONL line (default: token)",
+    )
+    parser.add_argument(
+        "-c", "--config", help="config JSON file (default: the GUI's config.json)"
+    )
+    parser.add_argument(
+        "-j",
+        "--jobs",
+        type=int,
+        default=1,
+        help="number of worker processes (0 = number of CPUs)",
+    )
+    parser.add_argument(
+        "-r", "--recursive", action="store_true", help="search directories recursively"
+    )
+    parser.add_argument(
+        "-q", "--quiet", action="store_true", help="only report failures"
+    )
+    parser.add_argument(
+        "--manifest",
+        help=f"run manifest database (default: OUTPUT_DIR/{MANIFEST_FILENAME})",
+    )
+    parser.add_argument(
+        "--resume",
+        action="store_true",
+        help="skip inputs the manifest records as done with the same settings",
+    )
+    parser.add_argument(
+        "--use-cache",
+        action="store_true",
+        help="reuse and store results in the result cache for this run",
+    )
+    return parser
+
+
+def build_cache_parser() -> argparse.ArgumentParser:
+    parser = argparse.ArgumentParser(
+        prog="openchj-annotator cache",
+        description="Inspect or shrink the result cache.",
+    )
+    parser.add_argument("command", choices=["stats", "prune"])
+    parser.add_argument("-c", "--config", help="config JSON file")
+    parser.add_argument(
+        "--max-size-mb",
+        type=int,
+        help="size to prune down to (default: result_cache.max_size_mb)",
+    )
+    return parser
+
+
+def load_config(config_path: Optional[str]) -> Config:
+    if config_path:
+        return Config(config_path)
+    if os.environ.get("OPENCHJ_IS_FROZEN", "0") == "1":
+        return Config()
+    return Config(str(path_manager.get_effective_config_file_path("config.json")))
+
+
+def cache_main(argv: List[str]) -> int:
+    args = build_cache_parser().parse_args(argv)
+    logging.basicConfig(level=logging.INFO, format="%(levelname)s: %(message)s")
+    cache_settings = load_config(args.config).config.get("result_cache", {})
+    result_cache = ResultCache(
+        cache_settings.get("directory") or get_default_result_cache_dir(),
+        max_size_mb=cache_settings.get("max_size_mb", DEFAULT_MAX_CACHE_SIZE_MB),
+    )
+
+    if args.command == "prune":
+        max_bytes = None if args.max_size_mb is None else args.max_size_mb * 1024 * 1024
+        print(f"Evicted {result_cache.prune(max_bytes)} entries.")
+
+    stats = result_cache.stats()
+    print(f"Directory: {stats['directory']}")
+    print(f"Entries:   {stats['entries']}")
+    print(
+        f"Size:      {format_file_size(stats['size_bytes'])}"
+        f" / {format_file_size(stats['max_size_bytes'])}"
+    )
+    return 0
+
+
+def run_batch(
+    jobs: List[Tuple[str, str]],
+    config,
+    num_workers: int = 1,
+    manifest: Optional[BatchManifest] = None,
+) -> Tuple[int, int, int]:
+    success_count = 0
+    fail_count = 0
+    cached_count = 0
+    for (file_path, output_path), result in zip(
+        jobs, iter_batch_results(jobs, config, num_workers)
+    ):
+        if manifest is not None:
+            manifest.record(
+                file_path,
+                output_path,
+                result.success,
+                result.content_hash,
+                None if result.success else result.path_or_error,
+            )
+        if result.success:
+            success_count += 1
+            cached_count += result.from_cache
+            logging.info(f"{file_path} -> {result.path_or_error}")
+        else:
+            fail_count += 1
+            logging.error(f"{file_path}: {result.path_or_error}")
+    return success_count, fail_count, cached_count
+
+
+def main(argv: Optional[List[str]] = None) -> int:
+    argv = sys.argv[1:] if argv is None else argv
+    if argv and argv[0] == "cache":
+        return cache_main(argv[1:])
+
+    args = build_parser().parse_args(argv)
+    logging.basicConfig(
+        level=logging.ERROR if args.quiet else logging.INFO,
+        format="%(levelname)s: %(message)s",
+    )
+
+    config = load_config(args.config)
+    if args.use_cache:
+        config.config.setdefault("result_cache", {})["enabled"] = True
+    output_settings = config.config.setdefault("output_settings", {})
+    if args.format:
+        output_settings["format"] = args.format.upper()
+    if args.jsonl_unit:
+        output_settings["jsonl_unit"] = args.jsonl_unit
+
+    input_files = collect_input_files(args.inputs, args.recursive)
+    if not input_files:
+        logging.error("No input text files found.")
+        return 1
+
+    prefix, suffix = get_output_affixes(config)
+    extension = get_output_extension(config)
+    jobs = [
+        (
+            file_path,
+            build_output_path(
+                relative_path, args.output_dir, prefix, suffix, extension
+            ),
+        )
+        for file_path, relative_path in input_files
+    ]
+    manifest_path = args.manifest or os.path.join(args.output_dir, MANIFEST_FILENAME)
+    with BatchManifest.for_config(manifest_path, config) as manifest:
+        skipped_count = 0
+        if args.resume:
+            pending_jobs = [
+                job for job in jobs if not manifest.is_complete(job[0], job[1])
+            ]
+            skipped_count = len(jobs) - len(pending_jobs)
+            jobs = pending_jobs
+            logging.info(f"Resuming: {skipped_count} files already done.")
+            if not jobs:
+                print(
+                    f"Nothing to do: all {skipped_count} files already done.",
+                    file=sys.stderr,
+                )
+                return 0
+
+        num_workers = args.jobs if args.jobs > 0 else os.cpu_count() or 1
+        num_workers = max(1, min(num_workers, len(jobs)))
+        success_count, fail_count, cached_count = run_batch(
+            jobs, config, num_workers, manifest
+        )
+
+    summary = (
+        f"Processed {success_count + fail_count} files: "
+        f"{success_count} succeeded ({cached_count} from cache), {fail_count} failed"
+    )
+    if skipped_count:
+        summary += f", {skipped_count} skipped as done"
+    print(f"{summary}.", file=sys.stderr)
+    return 1 if fail_count else 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
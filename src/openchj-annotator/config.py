@@ -23,6 +23,7 @@ class Config:
             "enabled": False,
             "types": [],
             "mode": "remove_with_content",
+            "nested": False,
         },
         "regex_settings": {"enabled": False, "patterns": []},
         "tag_special_settings": {"tag_patterns": []},
@@ -36,6 +37,7 @@ class Config:
         "aozora_cleanup": False,
         "output_settings": {
             "format": "TSV",
+            "jsonl_unit": "token",
             "prefix": "",
             "suffix": None,
             "default_directory": "",
@@ -47,6 +49,10 @@ class Config:
             "use_custom_output_dir": False,
         },
         "output_newline": "\n",
+        "analysis_cache": {"enabled": False, "max_sentences": 20000},
+        "segmentation": {"target_chars": 100 * 1024, "max_chars": 200 * 1024},
+        "batch_processing": {"max_workers": 0, "write_directly": False},
+        "result_cache": {"enabled": False, "directory": None, "max_size_mb": 2048},
     }
 
     def __init__(self, config_file_path_str: Optional[str] = None):
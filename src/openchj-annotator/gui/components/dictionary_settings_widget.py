@@ -1,7 +1,6 @@
 import logging
 import os
 
-import fugashi
 from gui.styles import (
     apply_button_style,
     apply_combobox_style,
@@ -441,6 +440,13 @@ class DictionarySettingsWidget(QWidget):
                 )
                 options = f'{options} -u "{user_dict_path}"'
 
+        # A private tagger: validation runs on the GUI thread while an
+        # analysis may be tagging with the pooled one
+        return self._build_validation_tagger(options)
+
+    def _build_validation_tagger(self, options):
+        import fugashi
+
         try:
             tagger = fugashi.Tagger(options)
             tagger("テスト文章です")
@@ -1,6 +1,9 @@
 import logging
 import os
+import shutil
 
+from analyzer.batch import build_output_path, get_output_affixes, write_result_file
+from analyzer.formatter import get_output_extension
 from gui.styles import apply_button_style
 from gui.workers.analysis_worker import AnalysisWorker
 from gui.workers.batch_analysis_worker import BatchAnalysisWorker
@@ -359,6 +362,20 @@ class AnalysisController:
             )
             return
 
+        output_paths = None
+        if self.main_window.config.config.get("batch_processing", {}).get(
+            "write_directly", False
+        ):
+            prefix, suffix = get_output_affixes(self.main_window.config)
+            output_dir = self._get_batch_output_dir(prefix, suffix)
+            extension = get_output_extension(self.main_window.config)
+            output_paths = [
+                build_output_path(
+                    os.path.basename(f), output_dir, prefix, suffix, extension
+                )
+                for f in files_to_process
+            ]
+
         self.main_window.analyze_tab.processing_status_changed.emit(
             True, "バッチ処理中..."
         )
@@ -368,6 +385,7 @@ class AnalysisController:
             self.main_window.config,
             is_folder,
             folder_path,
+            output_paths,
         )
         self.main_window.batch_worker.message.connect(
             lambda msg: self.update_processing_message(msg)
@@ -429,67 +447,26 @@ class AnalysisController:
                 False, ""
             ),
         )
-        success_count = sum(1 for r in results if r[1])
+        success_count = sum(1 for r in results if r.success)
         fail_count = len(results) - success_count
-        output_dir = None
-        output_settings = self.main_window.config.config.get("output_settings", {})
-        is_folder_processing = (
-            self.main_window.analyze_tab.get_selected_folder() is not None
-        )
-        selected_folder_path = self.main_window.analyze_tab.get_selected_folder()
-
-        prefix = output_settings.get("prefix", "")
-        suffix = output_settings.get("suffix")
-        if not suffix:
-            from utils.dictionary_info import get_dictionary_based_suffix
-
-            suffix = get_dictionary_based_suffix(self.main_window.config)
-        suffix = replace_datetime_placeholder(suffix)
-
-        if output_settings.get("use_custom_output_dir", False):
-            output_dir = output_settings.get("output_directory")
-            if is_folder_processing and selected_folder_path:
-                folder_name = os.path.basename(selected_folder_path)
-                output_dir = os.path.join(output_dir, f"{prefix}{folder_name}{suffix}")
-        else:
-            default_dir = (
-                output_settings.get("default_directory", "")
-                or get_downloads_directory()
-            )
-            if is_folder_processing and selected_folder_path:
-                folder_name = os.path.basename(selected_folder_path)
-                output_dir = os.path.join(default_dir, f"{prefix}{folder_name}{suffix}")
-            else:
-                output_dir = default_dir
 
         output_results_display = []
         max_lines = 1000
         current_lines = 0
-        for filename, success, result_path_or_error in results:
-            if success and result_path_or_error:
-                try:
-                    with open(result_path_or_error, "r", encoding="utf-8") as f:
-                        for line in f:
-                            if current_lines >= max_lines:
-                                break
-                            if line.strip() and not line.startswith("ファイル名"):
-                                output_results_display.append(line.rstrip("\n"))
-                                current_lines += 1
-                except Exception as e:
-                    if current_lines < max_lines:
-                        output_results_display.append(
-                            f"結果ファイルの読み込みエラー: {str(e)}"
-                        )
+        for result in results:
+            if current_lines >= max_lines:
+                break
+            if result.success:
+                preview = result.preview[: max_lines - current_lines]
+                output_results_display.extend(preview)
+                current_lines += len(preview)
+            else:
+                for line in str(result.path_or_error).split("\n"):
+                    if current_lines >= max_lines:
+                        break
+                    if line.strip():
+                        output_results_display.append(line)
                         current_lines += 1
-            elif not success:
-                if current_lines < max_lines:
-                    error_lines = str(result_path_or_error).split("\n")
-                    for line in error_lines:
-                        if current_lines >= max_lines:
-                            break
-                        if line.strip():
-                            output_results_display.append(line)
-                            current_lines += 1
 
         result_text = "\n".join(output_results_display)
 
@@ -514,11 +491,8 @@ class AnalysisController:
         if fail_count > 0:
             stats_text += f" (処理失敗ファイル数:{fail_count})"
 
-        if current_lines >= max_lines or any(
-            len(open(r[2], "r", encoding="utf-8").readlines()) > max_lines
-            for r in results
-            if r[1] and r[2]
-        ):
+        total_rows = sum(r.row_count for r in results if r.success)
+        if current_lines >= max_lines or total_rows > max_lines:
             stats_text += " (一部表示)"
 
         self.main_window.analyze_tab.set_output_stats(stats_text)
@@ -645,6 +619,21 @@ class AnalysisController:
 
         return "\n".join(result_lines)
 
+    def _get_batch_output_dir(self, prefix: str, suffix: str) -> str:
+        output_settings = self.main_window.config.config.get("output_settings", {})
+        if output_settings.get("use_custom_output_dir", False):
+            output_dir = output_settings.get("output_directory", "")
+        else:
+            output_dir = (
+                output_settings.get("default_directory", "")
+                or get_downloads_directory()
+            )
+        selected_folder_path = self.main_window.analyze_tab.get_selected_folder()
+        if selected_folder_path:
+            folder_name = os.path.basename(selected_folder_path)
+            output_dir = os.path.join(output_dir, f"{prefix}{folder_name}{suffix}")
+        return output_dir
+
     def download_result(self, output_format="openchj"):
         if (
             not self.main_window.current_result_text
@@ -676,43 +665,34 @@ class AnalysisController:
 
         if is_batch:
             try:
-                selected_folder_path = (
-                    self.main_window.analyze_tab.get_selected_folder()
-                )
-                if selected_folder_path:
-                    folder_name = os.path.basename(selected_folder_path)
-                    output_dir = os.path.join(
-                        output_dir, f"{prefix}{folder_name}{suffix}"
-                    )
+                output_dir = self._get_batch_output_dir(prefix, suffix)
                 os.makedirs(output_dir, exist_ok=True)
                 success_count = 0
-                for (
-                    filename,
-                    success,
-                    result_path_or_error,
-                ) in self.main_window.current_result_data:
-                    if (
-                        success
-                        and result_path_or_error
-                        and os.path.exists(result_path_or_error)
+                for result in self.main_window.current_result_data:
+                    if not (
+                        result.success
+                        and result.path_or_error
+                        and os.path.exists(result.path_or_error)
                     ):
-                        ext = os.path.splitext(result_path_or_error)[1] or ".txt"
-                        base_name = os.path.splitext(filename)[0]
-                        output_filename = f"{prefix}{base_name}{suffix}{ext}"
-                        output_path = os.path.join(output_dir, output_filename)
-
+                        continue
+                    ext = os.path.splitext(result.path_or_error)[1] or ".txt"
+                    base_name = os.path.splitext(result.filename)[0]
+                    output_filename = f"{prefix}{base_name}{suffix}{ext}"
+                    output_path = os.path.join(output_dir, output_filename)
+
+                    # Only TSV results have the fields of the simple format
+                    if output_format == "simple" and ext == ".txt":
                         with open(
-                            result_path_or_error, "r", encoding="utf-8"
+                            result.path_or_error, "r", encoding="utf-8"
                         ) as src_file:
-                            content = src_file.read()
-                            content = content.replace("\r\n", "\n")
-
-                            if output_format == "simple":
-                                content = self._extract_three_fields(content)
-
-                            with open(output_path, "wb") as dst_file:
-                                dst_file.write(content.encode("utf-8"))
-                        success_count += 1
+                            content = self._extract_three_fields(src_file.read())
+                        write_result_file(content, output_path, preview_lines=0)
+                    elif os.path.abspath(output_path) != os.path.abspath(
+                        result.path_or_error
+                    ):
+                        # Results are already UTF-8 with LF newlines
+                        shutil.copyfile(result.path_or_error, output_path)
+                    success_count += 1
 
                 if is_custom_dir:
                     msg_box = QMessageBox(self.main_window)
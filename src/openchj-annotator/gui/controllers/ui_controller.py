@@ -4,9 +4,6 @@ import platform
 import subprocess
 from typing import Dict, Optional
 
-from gui.dialogs.format_settings.format_settings_dialog import FormatSettingsDialog
-from gui.dialogs.show_custom_dict_help import show_custom_dict_help_dialog
-from gui.dialogs.show_user_dict_help import show_user_dict_help_dialog
 from gui.styles import apply_button_style
 from PySide6.QtCore import QTimer
 from PySide6.QtWidgets import QMessageBox
@@ -117,6 +114,10 @@ class UIController:
         self.main_window.current_result_data = None
 
     def show_format_settings(self):
+        from gui.dialogs.format_settings.format_settings_dialog import (
+            FormatSettingsDialog,
+        )
+
         dialog = FormatSettingsDialog(self.main_window)
         dialog.settings_applied.connect(self._handle_format_settings_applied)
         dialog.exec_()
@@ -135,6 +136,8 @@ class UIController:
                     f"ヘルプファイルが見つかりません:\n{help_file}",
                 )
                 return
+            from gui.dialogs.show_user_dict_help import show_user_dict_help_dialog
+
             show_user_dict_help_dialog(self.main_window, str(help_file))
         except Exception as e:
             logging.error(f"Error showing user dict help: {e}")
@@ -153,6 +156,10 @@ class UIController:
                     f"ヘルプファイルが見つかりません:\n{help_file}",
                 )
                 return
+            from gui.dialogs.show_custom_dict_help import (
+                show_custom_dict_help_dialog,
+            )
+
             show_custom_dict_help_dialog(self.main_window, str(help_file))
         except Exception as e:
             logging.error(f"Error showing custom dict help: {e}")
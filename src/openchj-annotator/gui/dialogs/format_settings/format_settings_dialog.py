@@ -120,6 +120,7 @@ class FormatSettingsDialog(QDialog):
                 "mode": preview_settings.get("tag_settings", {}).get(
                     "mode", "remove_with_content"
                 ),
+                "nested": preview_settings.get("tag_settings", {}).get("nested", False),
             },
             "aozora_cleanup": preview_settings.get("aozora_cleanup", False),
             "regex_settings": {
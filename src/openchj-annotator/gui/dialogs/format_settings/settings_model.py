@@ -7,6 +7,7 @@ class TagSettings(TypedDict, total=False):
     enabled: bool
     types: List[str]
     mode: str
+    nested: bool
 
 
 class RegexPatternItem(TypedDict, total=False):
@@ -107,6 +108,7 @@ class SettingsModel:
                 "enabled": False,
                 "types": [],
                 "mode": "remove_with_content",
+                "nested": False,
             },
             "regex_settings": {"enabled": False, "patterns": []},
             "whitespace_settings": {
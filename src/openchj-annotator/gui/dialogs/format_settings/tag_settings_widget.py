@@ -48,6 +48,12 @@ class TagSettingsWidget(BaseSettingsWidget):
         apply_checkbox_style(self.keep_content_check)
         self.keep_content_check.setMinimumWidth(180)
         enable_layout.addWidget(self.keep_content_check)
+        enable_layout.addSpacing(10)
+
+        self.nested_check = CustomCheckBox("入れ子のタグを考慮する")
+        apply_checkbox_style(self.nested_check)
+        self.nested_check.setMinimumWidth(180)
+        enable_layout.addWidget(self.nested_check)
         enable_layout.addStretch()
         frame_layout.addLayout(enable_layout)
 
@@ -130,6 +136,7 @@ class TagSettingsWidget(BaseSettingsWidget):
             self._on_tag_enable_changed_and_update_dependent_controls
         )
         self.keep_content_check.stateChanged.connect(self._on_tag_mode_changed)
+        self.nested_check.stateChanged.connect(self._on_tag_nested_changed)
         for key, cb in self.tag_checkboxes.items():
             cb.stateChanged.connect(
                 lambda state, tag_key=key: self._on_tag_type_changed(tag_key, state)
@@ -177,6 +184,7 @@ class TagSettingsWidget(BaseSettingsWidget):
             )
 
             self.keep_content_check.setEnabled(False)
+            self.nested_check.setEnabled(False)
             for cb in self.tag_checkboxes.values():
                 cb.setEnabled(False)
         else:
@@ -186,13 +194,19 @@ class TagSettingsWidget(BaseSettingsWidget):
 
             general_tag_removal_enabled = self.tag_enable_check.isChecked()
             self.keep_content_check.setEnabled(general_tag_removal_enabled)
+            self.nested_check.setEnabled(general_tag_removal_enabled)
             for cb in self.tag_checkboxes.values():
                 cb.setEnabled(general_tag_removal_enabled)
 
     def load_settings(self):
         if not self.config:
             self._update_ui_state(
-                {"enabled": False, "types": [], "mode": "remove_with_content"},
+                {
+                    "enabled": False,
+                    "types": [],
+                    "mode": "remove_with_content",
+                    "nested": False,
+                },
                 {"tag_patterns": []},
             )
 
@@ -225,6 +239,7 @@ class TagSettingsWidget(BaseSettingsWidget):
             tag_settings.get("mode", "remove_with_content") == "remove_tags_only"
         )
         self.keep_content_check.setChecked(is_keep_content)
+        self.nested_check.setChecked(tag_settings.get("nested", False))
         enabled_tags = tag_settings.get("types", [])
         for key, cb in self.tag_checkboxes.items():
             cb.setChecked(key in enabled_tags)
@@ -241,6 +256,10 @@ class TagSettingsWidget(BaseSettingsWidget):
         self._save_config_value(["remove_tags", "mode"], mode)
         self.config_changed.emit()
 
+    def _on_tag_nested_changed(self, state: int):
+        self._save_config_value(["remove_tags", "nested"], state == 2)
+        self.config_changed.emit()
+
     def _on_tag_type_changed(self, tag_type: str, state: int):
         if not self.config:
             logging.warning("Config is None in _on_tag_type_changed")
@@ -313,6 +332,7 @@ class TagSettingsWidget(BaseSettingsWidget):
                 if self.keep_content_check.isChecked()
                 else "remove_with_content"
             ),
+            "nested": self.nested_check.isChecked(),
             "types": [key for key, cb in self.tag_checkboxes.items() if cb.isChecked()],
         }
 
@@ -332,6 +352,7 @@ class TagSettingsWidget(BaseSettingsWidget):
             "enabled": False,
             "types": [],
             "mode": "remove_with_content",
+            "nested": False,
         }
 
         self.tag_special_settings_widget.clear_patterns()
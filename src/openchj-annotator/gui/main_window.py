@@ -2,6 +2,7 @@ import logging
 import os
 
 from analyzer import OpenCHJAnnotator
+from analyzer.tagger_pool import config_dictionary_fingerprint
 from gui.styles import DEFAULT_FONT_FAMILY, apply_tab_style
 from PySide6.QtCore import QTimer
 from PySide6.QtGui import QIcon
@@ -222,7 +223,16 @@ class MainWindow(QMainWindow):
                 )
                 return
 
-            self.analyzer = OpenCHJAnnotator(self.config)
+            # Keep the warm analyzer while the dictionary files are unchanged,
+            # but pick up any other settings changed since it was built
+            if (
+                self.analyzer is None
+                or self.analyzer.dictionary_fingerprint
+                != config_dictionary_fingerprint(self.config)
+            ):
+                self.analyzer = OpenCHJAnnotator(self.config)
+            else:
+                self.analyzer.reload_settings(self.config)
 
             if self.analyze_tab and hasattr(self, "ui_controller"):
                 try:
@@ -80,7 +80,12 @@ class AnalysisWorker(QThread):
             )
 
             results, rekion_pid, rekion_utterance_info = (
-                self.analyzer.analyze_with_source(self.text, source_filename=filename)
+                self.analyzer.analyze_with_source(
+                    self.text,
+                    source_filename=filename,
+                    # Edited manual input only re-tags the sentences that changed
+                    incremental=self.text_source is None,
+                )
             )
             self.stop_animation.emit()
 
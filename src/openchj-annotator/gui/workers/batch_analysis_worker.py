@@ -2,6 +2,7 @@ import logging
 import os
 import time
 
+from analyzer.batch import get_batch_worker_count, iter_batch_results
 from PySide6.QtCore import QObject, QThread, QTimer, Signal
 
 
@@ -50,11 +51,19 @@ class BatchAnalysisWorker(QThread):
     stop_animation = Signal()
 
     def __init__(
-        self, analyzer, files, config, is_folder_processing=False, folder_path=None
+        self,
+        analyzer,
+        files,
+        config,
+        is_folder_processing=False,
+        folder_path=None,
+        output_paths=None,
     ):
         super().__init__()
         self.analyzer = analyzer
         self.files = files
+        # Final result paths; None stages results in temporary files
+        self.output_paths = output_paths
         self.config = config
         self.is_folder_processing = is_folder_processing
         self.folder_path = folder_path
@@ -77,63 +86,24 @@ class BatchAnalysisWorker(QThread):
         results = []
 
         try:
-            for i, file_path in enumerate(self.files):
-                filename = os.path.basename(file_path)
-                self.progress.emit(i + 1, filename)
-
+            total = len(self.files)
+            if total:
+                self.progress.emit(1, os.path.basename(self.files[0]))
                 self.start_animation.emit(
-                    f"処理中: {filename} ({i+1}/{len(self.files)})"
+                    f"処理中: {os.path.basename(self.files[0])} (1/{total})"
                 )
 
-                try:
-                    import tempfile
-
-                    fd, temp_path = tempfile.mkstemp(suffix=".txt")
-                    os.close(fd)
-                    from utils.file_utils import read_text_file, write_text_file
-
-                    try:
-
-                        text = read_text_file(file_path)
-                        if not text.strip():
-                            logging.warning(
-                                f"Empty file was read as a result: {filename}"
-                            )
-                            results.append(
-                                (
-                                    filename,
-                                    False,
-                                    "The file is empty or all reading failed.",
-                                )
-                            )
-                            continue
-
-                        results_data, rekion_pid, rekion_utterance_info = (
-                            self.analyzer.analyze_with_source(
-                                text, source_filename=filename
-                            )
-                        )
-
-                        content = self.analyzer.format_as_tsv(
-                            results_data,
-                            filename,
-                            rekion_pid=rekion_pid,
-                            rekion_utterance_info=rekion_utterance_info,
-                        )
-
-                        write_text_file(content, temp_path, encoding="utf-8")
-                        results.append((filename, True, temp_path))
-                    except UnicodeDecodeError as ude:
-                        logging.error(
-                            f"Encoding error during batch processing: {ude} - {filename}"
-                        )
-                        results.append((filename, False, f"Encoding error: {str(ude)}"))
-                    finally:
-
-                        self.stop_animation.emit()
-                except Exception as e:
-                    results.append((filename, False, str(e)))
-                    self.stop_animation.emit()
+            num_workers = get_batch_worker_count(self.config, total)
+            jobs = list(zip(self.files, self.output_paths or [None] * len(self.files)))
+            for i, result in enumerate(
+                iter_batch_results(jobs, self.config, num_workers, self.analyzer)
+            ):
+                results.append(result)
+                self.stop_animation.emit()
+                if i + 1 < total:
+                    filename = os.path.basename(self.files[i + 1])
+                    self.progress.emit(i + 2, filename)
+                    self.start_animation.emit(f"処理中: {filename} ({i+2}/{total})")
 
             self.start_animation.emit("処理完了")
             time.sleep(0.5)
@@ -1,3 +1,4 @@
+import multiprocessing
 import os
 import sys
 
@@ -10,6 +11,7 @@ from config import Config
 
 
 def main():
+    multiprocessing.freeze_support()
     app = QApplication(sys.argv)
 
     if os.name == "nt":
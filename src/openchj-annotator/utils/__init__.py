@@ -16,6 +16,7 @@ from .file_utils import (
     replace_datetime_placeholder,
     split_text_by_sentences,
     write_text_file,
+    write_text_lines,
 )
 from .tag_processor import TagProcessor
 
@@ -23,6 +24,7 @@ __all__ = [
     "get_downloads_directory",
     "read_text_file",
     "write_text_file",
+    "write_text_lines",
     "replace_datetime_placeholder",
     "detect_encoding",
     "extract_zip_file",
@@ -1,98 +1,244 @@
+import codecs
 import datetime
 import logging
 import os
 import platform
 import re
+import threading
 import zipfile
+from collections import OrderedDict
 from pathlib import Path
-from typing import Iterator, List
-from winreg import HKEY_CURRENT_USER, OpenKey, QueryValueEx
+from typing import BinaryIO, Iterable, Iterator, List, Optional, Tuple
 
-import chardet
+BOM_ENCODINGS = (
+    (b"\xef\xbb\xbf", "utf-8-sig"),
+    (b"\xff\xfe", "utf-16"),
+    (b"\xfe\xff", "utf-16"),
+)
+
+# Tried in order on a sample of non-UTF-8 bytes. Shift_JIS lead bytes
+# 0x81-0x9F are invalid in EUC-JP, while EUC-JP text often decodes as
+# cp932 mojibake, so EUC-JP has to come first.
+PROBE_ENCODINGS = ("euc_jp", "cp932")
+
+DEFAULT_LEGACY_ENCODING = "cp932"
+
+# Last resorts once detection and the probe encodings have failed; latin1
+# maps every byte, so it always ends the list
+FALLBACK_ENCODINGS = ("shift_jis", "iso2022_jp", "latin1")
+
+ENCODING_SAMPLE_SIZE = 32 * 1024
+
+# Chunk size when checking that a mapped file decodes without holding it
+DECODE_CHECK_BYTES = 4 * 1024 * 1024
+
+# chardet names mapped to the codec that also covers vendor extensions
+CHARDET_ENCODING_ALIASES = {
+    "shift_jis": "cp932",
+    "euc-jp": "euc_jp",
+    "iso-2022-jp": "iso2022_jp",
+}
+
+MAX_CACHED_ENCODINGS = 65536
+
+# Characters encoded per write when streaming lines to a file
+WRITE_BUFFER_CHARS = 1024 * 1024
+
+# Per process: the GUI preview and analysis share it, while each batch file
+# is read by exactly one worker, which would gain nothing from a shared one
+_encoding_cache: "OrderedDict[Tuple[str, int, int], str]" = OrderedDict()
+_encoding_cache_lock = threading.Lock()
+
+
+def _file_cache_key(file_path: str) -> Optional[Tuple[str, int, int]]:
+    try:
+        stat_result = os.stat(file_path)
+    except OSError:
+        return None
+    return (
+        os.path.abspath(file_path),
+        stat_result.st_size,
+        stat_result.st_mtime_ns,
+    )
+
+
+def get_cached_encoding(file_path: str) -> Optional[str]:
+    key = _file_cache_key(file_path)
+    if key is None:
+        return None
+    with _encoding_cache_lock:
+        return _encoding_cache.get(key)
+
+
+def _remember_encoding(file_path: str, encoding: str) -> None:
+    key = _file_cache_key(file_path)
+    if key is None:
+        return
+    with _encoding_cache_lock:
+        _encoding_cache[key] = encoding
+        _encoding_cache.move_to_end(key)
+        while len(_encoding_cache) > MAX_CACHED_ENCODINGS:
+            _encoding_cache.popitem(last=False)
+
+
+def _decodes_cleanly(sample: bytes, encoding: str) -> bool:
+    # The sample may end inside a multibyte character
+    decoder = codecs.getincrementaldecoder(encoding)(errors="strict")
+    try:
+        decoder.decode(sample, final=False)
+        return True
+    except UnicodeDecodeError:
+        return False
+
+
+def _probe_sample_encoding(sample: bytes) -> str:
+    if b"\x1b$" in sample:
+        return "iso2022_jp"
+    for encoding in PROBE_ENCODINGS:
+        if _decodes_cleanly(sample, encoding):
+            return encoding
+
+    import chardet
+
+    result = chardet.detect(sample)
+    encoding = (result.get("encoding") or "").lower()
+    if result.get("confidence", 0) > 0.7 and encoding:
+        return CHARDET_ENCODING_ALIASES.get(encoding, encoding)
+    return DEFAULT_LEGACY_ENCODING
+
+
+def _detect_bytes_encoding(data: bytes) -> str:
+    for bom, encoding in BOM_ENCODINGS:
+        if data.startswith(bom):
+            return encoding
+    if b"\x1b$" not in data and _decodes_cleanly(data, "utf-8"):
+        return "utf-8"
+    return _probe_sample_encoding(data)
 
 
 def detect_encoding(file_path: str) -> str:
+    cached_encoding = get_cached_encoding(file_path)
+    if cached_encoding:
+        return cached_encoding
+
     with open(file_path, "rb") as f:
-        raw_data = f.read(4096)
+        raw_data = f.read(ENCODING_SAMPLE_SIZE)
         file_size = os.path.getsize(file_path)
-        if file_size > 8192:
-            f.seek(file_size // 2 - 2048)
-            raw_data += f.read(4096)
+        if file_size > 2 * ENCODING_SAMPLE_SIZE:
+            f.seek(file_size // 2)
+            # Restart at a line boundary so the sample has no split character
+            f.readline()
+            raw_data += b"\n" + f.read(ENCODING_SAMPLE_SIZE)
+    return _detect_bytes_encoding(raw_data)
 
-        result = chardet.detect(raw_data)
-        confidence = result.get("confidence", 0)
-        encoding = result.get("encoding")
 
-        if confidence > 0.7 and encoding:
-            return encoding
+def _normalize_newlines(text: str) -> str:
+    # Universal newlines, as text-mode reading gave before
+    if "\r" not in text:
+        return text
+    return text.replace("\r\n", "\n").replace("\r", "\n")
 
-        if raw_data.startswith(b"\xef\xbb\xbf"):
-            return "utf-8-sig"
-        if raw_data.startswith(b"\xff\xfe"):
-            return "utf-16le"
-        if raw_data.startswith(b"\xfe\xff"):
-            return "utf-16be"
 
-        if encoding:
-            return encoding
-        else:
-            return "cp932"
+def _bom_encoding(data) -> Optional[str]:
+    head = bytes(data[:4])
+    return next(
+        (bom_enc for bom, bom_enc in BOM_ENCODINGS if head.startswith(bom)), None
+    )
+
+
+def _get_decode_candidates(first_choice: str) -> List[str]:
+    return [first_choice] + [
+        fallback
+        for fallback in ("utf-8",) + PROBE_ENCODINGS + FALLBACK_ENCODINGS
+        if fallback != first_choice
+    ]
+
+
+def _decodes_fully(data, encoding: str) -> bool:
+    try:
+        decoder = codecs.getincrementaldecoder(encoding)(errors="strict")
+        for start in range(0, len(data), DECODE_CHECK_BYTES):
+            decoder.decode(data[start : start + DECODE_CHECK_BYTES])
+        decoder.decode(b"", final=True)
+        return True
+    except (UnicodeDecodeError, LookupError):
+        return False
+
+
+def choose_decoding(data, encoding: Optional[str] = None) -> Tuple[str, str]:
+    """
+    Pick the codec and error handler read_text_file would decode data with.
+
+    data may be an mmap; it is checked in chunks and never decoded whole,
+    so a file read in windows decodes exactly like one read at once.
+
+    Args:
+        data: Raw bytes of the whole file
+        encoding: Encoding to try first
+
+    Returns:
+        (encoding, errors) for codecs.getincrementaldecoder
+    """
+    first_choice = encoding or _bom_encoding(data)
+    if first_choice is None:
+        if data.find(b"\x1b$") == -1 and _decodes_fully(data, "utf-8"):
+            return "utf-8", "strict"
+        first_choice = _probe_sample_encoding(bytes(data[:ENCODING_SAMPLE_SIZE]))
+
+    for candidate in _get_decode_candidates(first_choice):
+        if _decodes_fully(data, candidate):
+            return candidate, "strict"
+    return "utf-8", "replace"
+
+
+def _decode_or_none(raw_data: bytes, encoding: str) -> Optional[str]:
+    try:
+        return _normalize_newlines(raw_data.decode(encoding))
+    except (UnicodeDecodeError, LookupError):
+        return None
 
 
 def read_text_file(file_path: str, encoding: str = None) -> str:
     if not os.path.exists(file_path):
         raise FileNotFoundError(f"File not found: {file_path}")
 
-    fallback_encodings = [
-        "utf-8",
-        "utf-8-sig",
-        "cp932",
-        "shift_jis",
-        "euc_jp",
-        "iso2022_jp",
-        "latin1",
-        "ascii",
-        "big5",
-        "windows-1250",
-        "windows-1251",
-        "windows-1252",
-    ]
-
-    try:
-        with open(file_path, "r", encoding=encoding) as f:
-            content = f.read()
+    with open(file_path, "rb") as f:
+        raw_data = f.read()
+
+    first_choice = encoding or get_cached_encoding(file_path)
+    if first_choice is None:
+        first_choice = _bom_encoding(raw_data)
+    if first_choice is None:
+        # Strict UTF-8 decoding validates and decodes in the same pass
+        content = _decode_or_none(raw_data, "utf-8")
+        if content is not None and "\x1b$" not in content:
+            _remember_encoding(file_path, "utf-8")
             return content
-    except UnicodeDecodeError:
-        pass
-    except Exception as e:
-        logging.warning(f"Unexpected error occurred while reading file: {e}")
+        first_choice = _probe_sample_encoding(raw_data[:ENCODING_SAMPLE_SIZE])
 
-    for enc in fallback_encodings:
-        if enc != encoding:
-            try:
-                with open(file_path, "r", encoding=enc) as f:
-                    content = f.read()
-                    return content
-            except UnicodeDecodeError:
-                continue
-            except Exception as e:
-                logging.warning(
-                    f"Unexpected error occurred while reading file with encoding {enc}: {e}"
-                )
+    for candidate in _get_decode_candidates(first_choice):
+        content = _decode_or_none(raw_data, candidate)
+        if content is not None:
+            if candidate != encoding:
+                _remember_encoding(file_path, candidate)
+            return content
 
     logging.warning(
         f"All encodings failed. Using fallback: {os.path.basename(file_path)}"
     )
-    with open(file_path, "rb") as f:
-        binary_data = f.read()
-        return binary_data.decode("utf-8", errors="replace")
+    return _normalize_newlines(raw_data.decode("utf-8", errors="replace"))
 
 
-def write_text_file(content: str, file_path: str, encoding: str = "utf-8") -> None:
+def _normalize_output_encoding(encoding: str) -> str:
     if encoding.lower() in ["utf8", "utf-8"]:
-        encoding = "utf-8"
-    elif encoding.lower() in ["shiftjis", "shift-jis", "sjis"]:
-        encoding = "cp932"
+        return "utf-8"
+    if encoding.lower() in ["shiftjis", "shift-jis", "sjis"]:
+        return "cp932"
+    return encoding
+
+
+def write_text_file(content: str, file_path: str, encoding: str = "utf-8") -> None:
+    encoding = _normalize_output_encoding(encoding)
 
     content = content.replace("\r\n", "\n")
     os.makedirs(os.path.dirname(os.path.abspath(file_path)), exist_ok=True)
@@ -122,6 +268,94 @@ def write_text_file(content: str, file_path: str, encoding: str = "utf-8") -> No
         raise
 
 
+class _LineEncoder:
+    # Applies write_text_file's fallbacks to a stream: a legacy encoding
+    # falls back to UTF-8 for the whole file, UTF-8 to replaced characters
+    def __init__(self, f: BinaryIO, encoding: str):
+        self.f = f
+        self.encoding = _normalize_output_encoding(encoding)
+        self.errors = "strict"
+        self.start = f.tell()
+        file_name = getattr(f, "name", None)
+        self.display_name = (
+            os.path.basename(file_name) if isinstance(file_name, str) else "stream"
+        )
+
+    def _reencode_written_as_utf8(self) -> None:
+        self.f.flush()
+        self.f.seek(self.start)
+        written_text = self.f.read().decode(self.encoding)
+        self.f.seek(self.start)
+        self.f.truncate()
+        self.f.write(written_text.encode("utf-8"))
+
+    def write(self, text: str) -> None:
+        while True:
+            try:
+                data = text.encode(self.encoding, self.errors)
+                break
+            except UnicodeEncodeError as e:
+                logging.error(f"Encoding error ({self.encoding}): {e}")
+                if self.encoding != "utf-8":
+                    logging.warning(
+                        f"Attempting fallback to UTF-8: {self.display_name}"
+                    )
+                    self._reencode_written_as_utf8()
+                    self.encoding = "utf-8"
+                else:
+                    logging.warning(
+                        f"Saving file with replaced characters: {self.display_name}"
+                    )
+                    self.errors = "replace"
+        self.f.write(data)
+
+
+def write_text_lines(
+    lines: Iterable[str],
+    f: BinaryIO,
+    encoding: str = "utf-8",
+    empty_text: str = "",
+) -> int:
+    """
+    Write lines to an open binary file without joining them into one string.
+
+    Each line gets a "\n" ending and the lines are encoded in batches of
+    about WRITE_BUFFER_CHARS characters. Encoding follows write_text_file:
+    if a line cannot be encoded in a legacy encoding, what was written so
+    far is re-encoded and the rest is written as UTF-8, so f has to be
+    readable and seekable (opened with "w+b").
+
+    Args:
+        lines: Lines without line endings, consumed once
+        f: Binary file to write to, from its current position
+        encoding: Output encoding
+        empty_text: Text written when there are no lines
+
+    Returns:
+        Number of lines written
+    """
+    encoder = _LineEncoder(f, encoding)
+    line_count = 0
+    batch: List[str] = []
+    batch_chars = 0
+
+    for line in lines:
+        batch.append(line)
+        batch.append("\n")
+        batch_chars += len(line) + 1
+        line_count += 1
+        if batch_chars >= WRITE_BUFFER_CHARS:
+            encoder.write("".join(batch).replace("\r\n", "\n"))
+            batch.clear()
+            batch_chars = 0
+
+    if batch:
+        encoder.write("".join(batch).replace("\r\n", "\n"))
+    elif line_count == 0 and empty_text:
+        encoder.write(empty_text)
+    return line_count
+
+
 def extract_zip_file(zip_path: str, extract_to: str) -> str:
     with zipfile.ZipFile(zip_path, "r") as zip_ref:
         zip_ref.extractall(extract_to)
@@ -259,6 +493,8 @@ def extract_filename_from_path(file_path: str) -> str:
 def get_downloads_directory() -> str:
     if platform.system() == "Windows":
         try:
+            from winreg import HKEY_CURRENT_USER, OpenKey, QueryValueEx
+
             with OpenKey(
                 HKEY_CURRENT_USER,
                 r"SOFTWARE\Microsoft\Windows\CurrentVersion\Explorer\Shell Folders",
@@ -1,7 +1,21 @@
+import codecs
 import gc
+import io
+import logging
+import mmap
+import os
 import sys
 from contextlib import contextmanager
-from typing import Generator
+from typing import Generator, Iterator, Optional, Tuple
+
+DEFAULT_WINDOW_BYTES = 4 * 1024 * 1024
+
+# Files above this size are analyzed window by window instead of as one string
+LARGE_FILE_THRESHOLD = 64 * 1024 * 1024
+
+WINDOW_SENTENCE_FINAL_CHARS = "。．！？"
+
+WINDOW_BLANK_CHARS = " \t\n\x0b"
 
 
 class MemoryOptimizer:
@@ -37,23 +51,80 @@ class MemoryOptimizer:
             resource.setrlimit(resource.RLIMIT_AS, (max_memory_mb * 1024 * 1024, hard))
 
 
-class ChunkProcessor:
-    def __init__(self, chunk_size: int = 1024 * 1024):
-        self.chunk_size = chunk_size
+class TextWindowReader:
+    """
+    Reads a large text file as a series of decoded windows.
+
+    The file is memory-mapped and decoded window by window, so it is never
+    held as one string. Each window ends before a newline (or, on lines
+    longer than a window, after a sentence-final character) and comes with
+    the character offset of its first character in the whole text.
+    """
+
+    def __init__(
+        self,
+        window_bytes: int = DEFAULT_WINDOW_BYTES,
+        max_window_chars: Optional[int] = None,
+    ):
+        self.window_bytes = window_bytes
+        # A text without any break is cut here rather than held whole
+        self.max_window_chars = max_window_chars or 4 * window_bytes
+
+    @staticmethod
+    def _find_break(text: str) -> int:
+        # The newline and the blanks before it open the next window, where
+        # MeCab reads them as leading white space just as in the whole text
+        cut = text.rfind("\n")
+        if cut != -1:
+            while cut > 0 and text[cut - 1] in WINDOW_BLANK_CHARS:
+                cut -= 1
+            if cut > 0:
+                return cut
+        return max(text.rfind(ch) for ch in WINDOW_SENTENCE_FINAL_CHARS) + 1
+
+    def iter_windows(
+        self, file_path: str, encoding: Optional[str] = None
+    ) -> Iterator[Tuple[int, str]]:
+        from .file_utils import choose_decoding, get_cached_encoding
+
+        char_offset = 0
+        pending_text = ""
 
-    def process_file_in_chunks(self, file_path: str, processor_func):
-        with open(file_path, "r", encoding="utf-8") as f:
-            while True:
-                chunk = f.read(self.chunk_size)
-                if not chunk:
-                    break
+        with open(file_path, "rb") as f:
+            file_size = os.fstat(f.fileno()).st_size
+            if file_size == 0:
+                return
+            with mmap.mmap(f.fileno(), 0, access=mmap.ACCESS_READ) as mapped:
+                # Same codec, fallbacks and newline translation as
+                # read_text_file, so the text does not depend on file size
+                encoding, errors = choose_decoding(
+                    mapped, encoding or get_cached_encoding(file_path)
+                )
+                if errors != "strict":
+                    logging.warning(
+                        "All encodings failed. Using fallback: "
+                        f"{os.path.basename(file_path)}"
+                    )
+                decoder = io.IncrementalNewlineDecoder(
+                    codecs.getincrementaldecoder(encoding)(errors=errors),
+                    translate=True,
+                )
+                for byte_start in range(0, file_size, self.window_bytes):
+                    byte_end = byte_start + self.window_bytes
+                    # Slicing copies just this window; a multibyte character
+                    # split at byte_end stays buffered in the decoder
+                    pending_text += decoder.decode(
+                        mapped[byte_start:byte_end], final=byte_end >= file_size
+                    )
+                    cut = self._find_break(pending_text)
+                    if cut == 0:
+                        if len(pending_text) < self.max_window_chars:
+                            continue
+                        cut = len(pending_text)
 
-                if not chunk.endswith(("。", "．", "！", "？", "\n")):
-                    next_char = f.read(1)
-                    while next_char and next_char not in ("。", "．", "！", "？", "\n"):
-                        chunk += next_char
-                        next_char = f.read(1)
-                    if next_char:
-                        chunk += next_char
+                    yield char_offset, pending_text[:cut]
+                    char_offset += cut
+                    pending_text = pending_text[cut:]
 
-                yield processor_func(chunk)
+        if pending_text:
+            yield char_offset, pending_text
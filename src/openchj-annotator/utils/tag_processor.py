@@ -1,59 +1,52 @@
 import logging
 import re
-from typing import Any, Dict, List, Tuple
-
-
-class TagProcessor:
-    def __init__(self, config=None):
-        self.config = config if config is not None else {}
-
-    def load_config(self, config_data):
-        self.config = config_data if config_data is not None else {}
-
-    def save_config(self):
-        return self.config.copy()
-
-    def process_text(
-        self, text: str, temp_config=None
-    ) -> Tuple[str, List[Dict[str, Any]]]:
-        original_text = text
-        detected_special_tags: List[Dict[str, Any]] = []
-
-        config_to_use = temp_config if temp_config is not None else self.config
-
-        if (
-            not config_to_use
-            or not isinstance(config_to_use, dict)
-            or not config_to_use.get("tag_patterns")
-        ):
-            return original_text, []
-
-        all_matches_with_config = []
-
-        for pattern_idx, pattern_config in enumerate(
-            config_to_use.get("tag_patterns", [])
-        ):
+from functools import lru_cache
+from typing import Any, Dict, Iterator, List, Optional, Tuple
+
+BRACKETS_MAP = {
+    "angle": ("<", ">"),
+    "angle_full": ("＜", "＞"),
+    "round": ("(", ")"),
+    "round_full": ("（", "）"),
+    "square": ("[", "]"),
+    "square_full": ("［", "］"),
+    "curly": ("{", "}"),
+    "curly_full": ("｛", "｝"),
+    "corner": ("【", "】"),
+}
+
+MAX_CACHED_TAG_MATCHERS = 16
+
+
+class TagMatcher:
+    def __init__(self, tag_patterns: List[Dict]):
+        # (matched length, regex, pattern_config); the separator variants of a
+        # tag are [key content], [key:content] and [key: content]
+        alternatives: List[Tuple[int, str, Dict]] = []
+
+        for pattern_idx, pattern_config in enumerate(tag_patterns or []):
             if not isinstance(pattern_config, dict):
                 logging.warning(
-                    f"TagProcessor.process_text: Skipping invalid pattern_config (not a dict) at index {pattern_idx}."
+                    f"TagMatcher: Skipping invalid pattern_config (not a dict) at index {pattern_idx}."
                 )
                 continue
 
             bracket_type = pattern_config.get("bracket_type", "")
             tag_content_key = pattern_config.get("tag_content", "")
-
             surface_form_in_config = pattern_config.get("surface_form", "")
 
             if not all([bracket_type, tag_content_key, surface_form_in_config]):
                 logging.warning(
-                    f"TagProcessor.process_text: Skipping incomplete tag pattern (missing bracket, key, or surface_form): {pattern_config}"
+                    f"TagMatcher: Skipping incomplete tag pattern (missing bracket, key, or surface_form): {pattern_config}"
                 )
                 continue
 
-            start_bracket_char, end_bracket_char = self._get_bracket_chars(bracket_type)
+            start_bracket_char, end_bracket_char = BRACKETS_MAP.get(
+                bracket_type, ("", "")
+            )
             if not start_bracket_char or not end_bracket_char:
                 logging.warning(
-                    f"TagProcessor.process_text: Invalid bracket type '{bracket_type}' for pattern: {pattern_config}"
+                    f"TagMatcher: Invalid bracket type '{bracket_type}' for pattern: {pattern_config}"
                 )
                 continue
 
@@ -61,56 +54,113 @@ class TagProcessor:
             end_escaped = re.escape(end_bracket_char)
             key_escaped = re.escape(tag_content_key)
             content_escaped = re.escape(surface_form_in_config)
+            base_length = (
+                len(start_bracket_char)
+                + len(tag_content_key)
+                + len(surface_form_in_config)
+                + len(end_bracket_char)
+            )
 
-            regex_variants = [
-                rf"{start_escaped}{key_escaped}{content_escaped}{end_escaped}",
-                rf"{start_escaped}{key_escaped}:{content_escaped}{end_escaped}",
-                rf"{start_escaped}{key_escaped}:\s{content_escaped}{end_escaped}",
-            ]
-
-            for variant_idx, regex_pattern_str in enumerate(regex_variants):
-                try:
-                    regex_pattern = re.compile(regex_pattern_str)
-                    for match in regex_pattern.finditer(original_text):
-                        char_start, char_end = match.span()
-                        original_tag_text_matched = match.group(0)
-
-                        all_matches_with_config.append(
-                            (
-                                char_start,
-                                char_end,
-                                original_tag_text_matched,
-                                surface_form_in_config,
-                                pattern_config,
-                            )
-                        )
-                except re.error as e:
-                    logging.error(
-                        f"TagProcessor.process_text: Regex error for pattern '{regex_pattern_str}': {e}"
+            for separator_regex, separator_length in (
+                ("", 0),
+                (":", 1),
+                (r":\s", 2),
+            ):
+                alternatives.append(
+                    (
+                        base_length + separator_length,
+                        rf"{start_escaped}{key_escaped}{separator_regex}{content_escaped}{end_escaped}",
+                        pattern_config,
                     )
+                )
 
-        if not all_matches_with_config:
-            return original_text, []
+        # Longest alternative first, so a single leftmost scan picks the same
+        # tag as collecting every match and keeping the longest per start
+        alternatives.sort(key=lambda alternative: -alternative[0])
 
-        all_matches_with_config.sort(key=lambda x: (x[0], -(x[1] - x[0])))
+        self.group_configs: List[Optional[Dict]] = [None]
+        self.regex = None
+        if alternatives:
+            self.group_configs.extend(
+                pattern_config for _length, _regex, pattern_config in alternatives
+            )
+            self.regex = re.compile(
+                "|".join(f"({regex})" for _length, regex, _config in alternatives)
+            )
 
-        non_overlapping_matches = []
-        last_char_end = -1
-        for match_data_tuple in all_matches_with_config:
-            char_start, char_end, original_tag_text, sf_conf, p_config_lambda = (
-                match_data_tuple
+    def __bool__(self) -> bool:
+        return self.regex is not None
+
+    def finditer(self, text: str) -> Iterator[Tuple[int, int, str, Dict]]:
+        if self.regex is None:
+            return
+        for match in self.regex.finditer(text):
+            char_start, char_end = match.span()
+            yield (
+                char_start,
+                char_end,
+                match.group(0),
+                self.group_configs[match.lastindex],
             )
-            if char_start >= last_char_end:
-                non_overlapping_matches.append(match_data_tuple)
-                last_char_end = char_end
+
+    def find_spans(self, text: str) -> List[Tuple[int, int]]:
+        return [
+            (char_start, char_end)
+            for char_start, char_end, _tag_text, _config in self.finditer(text)
+        ]
+
+
+@lru_cache(maxsize=MAX_CACHED_TAG_MATCHERS)
+def _compile_frozen_tag_matcher(frozen_patterns: Tuple) -> TagMatcher:
+    return TagMatcher([dict(pattern_items) for pattern_items in frozen_patterns])
+
+
+def get_tag_matcher(tag_patterns: Optional[List[Dict]]) -> TagMatcher:
+    try:
+        frozen_patterns = tuple(
+            tuple(sorted(pattern_config.items())) for pattern_config in tag_patterns
+        )
+        hash(frozen_patterns)
+    except (AttributeError, TypeError):
+        # Malformed or unhashable patterns are compiled without caching
+        return TagMatcher(tag_patterns or [])
+    return _compile_frozen_tag_matcher(frozen_patterns)
+
+
+class TagProcessor:
+    def __init__(self, config=None):
+        self.config = config if config is not None else {}
+
+    def load_config(self, config_data):
+        self.config = config_data if config_data is not None else {}
+
+    def save_config(self):
+        return self.config.copy()
+
+    def process_text(
+        self, text: str, temp_config=None
+    ) -> Tuple[str, List[Dict[str, Any]]]:
+        original_text = text
+        detected_special_tags: List[Dict[str, Any]] = []
+
+        config_to_use = temp_config if temp_config is not None else self.config
+
+        if (
+            not config_to_use
+            or not isinstance(config_to_use, dict)
+            or not config_to_use.get("tag_patterns")
+        ):
+            return original_text, []
+
+        tag_matcher = get_tag_matcher(config_to_use.get("tag_patterns", []))
 
         for (
             char_start,
             char_end,
             original_tag_text,
-            sf_from_config,
             p_config_final,
-        ) in non_overlapping_matches:
+        ) in tag_matcher.finditer(original_text):
+            sf_from_config = p_config_final.get("surface_form", "")
             tag_details = {
                 "original_char_start": char_start,
                 "original_char_end": char_end,
@@ -130,15 +180,4 @@ class TagProcessor:
         return original_text, detected_special_tags
 
     def _get_bracket_chars(self, bracket_type: str) -> Tuple[str, str]:
-        brackets_map = {
-            "angle": ("<", ">"),
-            "angle_full": ("＜", "＞"),
-            "round": ("(", ")"),
-            "round_full": ("（", "）"),
-            "square": ("[", "]"),
-            "square_full": ("［", "］"),
-            "curly": ("{", "}"),
-            "curly_full": ("｛", "｝"),
-            "corner": ("【", "】"),
-        }
-        return brackets_map.get(bracket_type, ("", ""))
+        return BRACKETS_MAP.get(bracket_type, ("", ""))
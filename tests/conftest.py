@@ -0,0 +1,29 @@
+import sys
+from pathlib import Path
+
+import pytest
+
+PROJECT_ROOT = Path(__file__).resolve().parent.parent
+PACKAGE_PATH = PROJECT_ROOT / "src" / "openchj-annotator"
+
+sys.path.insert(0, str(PACKAGE_PATH))
+
+from utils import path_manager  # noqa: E402
+
+path_manager.initialize_paths(str(PROJECT_ROOT))
+
+
+@pytest.fixture
+def config(tmp_path, monkeypatch):
+    from config import Config
+
+    # Keep the downloads lookup and config writes out of the real home
+    monkeypatch.setenv("XDG_CONFIG_HOME", str(tmp_path / "xdg"))
+    return Config(str(tmp_path / "config.json"))
+
+
+@pytest.fixture
+def annotator(config):
+    from analyzer.core import OpenCHJAnnotator
+
+    return OpenCHJAnnotator(config)
@@ -0,0 +1,51 @@
+from analyzer.core import OpenCHJAnnotator
+from utils.optimization import TextWindowReader
+
+MARKED_LINES = "".join(f"第{i}行は晴れです[B]\n" for i in range(3000))
+
+
+def _write_text(tmp_path, text, encoding="utf-8"):
+    path = tmp_path / "input.txt"
+    path.write_bytes(text.encode(encoding))
+    return str(path)
+
+
+def _analyze_both(annotator, path, text, window_bytes=4096):
+    windowed = list(
+        annotator.analyze_windows(TextWindowReader(window_bytes).iter_windows(path))
+    )
+    return annotator.analyze(text), windowed
+
+
+def test_explicit_markers_survive_window_edges(config, tmp_path):
+    config.config["sentence_boundary_settings"]["use_explicit_marker"] = True
+    annotator = OpenCHJAnnotator(config)
+    path = _write_text(tmp_path, MARKED_LINES)
+
+    whole, windowed = _analyze_both(annotator, path, MARKED_LINES)
+
+    assert sum(token["sentence_boundary"] == "B" for token in whole) == 3000
+    assert windowed == whole
+
+
+def test_crlf_windows_match_whole_text(annotator, tmp_path):
+    text = "".join(f"吾輩は猫である{i}。名前はまだ無い。\n" for i in range(500))
+    path = _write_text(tmp_path, text.replace("\n", "\r\n"), "cp932")
+
+    whole, windowed = _analyze_both(annotator, path, text, window_bytes=1024)
+
+    assert windowed == whole
+
+
+def test_windows_decode_like_read_text_file(tmp_path):
+    from utils.file_utils import read_text_file
+
+    lines = "".join(f"吾輩は猫である{i}。\r\n" for i in range(2000)).encode("utf-8")
+    # A stray byte deep in the file, and a file no candidate decodes
+    for data in (lines[:30000] + b"\xff" + lines[30000:], b"\x81\xff" + lines):
+        path = tmp_path / "input.txt"
+        path.write_bytes(data)
+        windows = TextWindowReader(4096).iter_windows(str(path))
+        assert "".join(text for _offset, text in windows) == read_text_file(
+            str(path)
+        )
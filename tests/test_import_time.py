@@ -0,0 +1,52 @@
+import subprocess
+import sys
+from pathlib import Path
+from typing import Dict
+
+import pytest
+
+PACKAGE_PATH = Path(__file__).resolve().parent.parent / "src" / "openchj-annotator"
+
+# Cumulative import budgets in microseconds, generous enough for a cold,
+# loaded machine but far below what an eager fugashi or Qt import costs
+ANALYZER_IMPORT_BUDGET_US = 1_000_000
+MAIN_IMPORT_BUDGET_US = 3_000_000
+
+# Loaded on first use, never while importing
+DEFERRED_MODULES = ("fugashi", "chardet")
+
+
+def _import_times(module: str) -> Dict[str, int]:
+    completed = subprocess.run(
+        [sys.executable, "-X", "importtime", "-c", f"import {module}"],
+        cwd=PACKAGE_PATH,
+        capture_output=True,
+        text=True,
+        check=True,
+    )
+    cumulative_times = {}
+    for line in completed.stderr.splitlines():
+        if not line.startswith("import time:") or "|" not in line:
+            continue
+        _self_us, cumulative_us, name = line[len("import time:") :].split("|")
+        if cumulative_us.strip().isdigit():
+            cumulative_times[name.strip()] = int(cumulative_us)
+    return cumulative_times
+
+
+def _assert_import_budget(module: str, budget_us: int) -> Dict[str, int]:
+    import_times = _import_times(module)
+    assert import_times[module] < budget_us
+    for deferred_module in DEFERRED_MODULES:
+        assert deferred_module not in import_times
+    return import_times
+
+
+def test_analyzer_import_budget():
+    import_times = _assert_import_budget("analyzer", ANALYZER_IMPORT_BUDGET_US)
+    assert not any(name.startswith("PySide6") for name in import_times)
+
+
+def test_main_import_budget():
+    pytest.importorskip("PySide6")
+    _assert_import_budget("main", MAIN_IMPORT_BUDGET_US)
@@ -0,0 +1,18 @@
+from analyzer.core import OpenCHJAnnotator
+
+TEXT = "".join(
+    f"「吾輩は猫である{i}。」名前はまだ無い[B]。\nどこで生れたかとんと見当がつかぬ。"
+    for i in range(400)
+)
+
+
+def test_parallel_matches_serial(config):
+    config.config["segmentation"] = {"target_chars": 1000, "max_chars": 2000}
+    config.config["sentence_boundary_settings"]["use_explicit_marker"] = True
+    annotator = OpenCHJAnnotator(config)
+    assert len(annotator._segment_formatted_text(TEXT, {})) > 4
+
+    serial = annotator.analyze(TEXT)
+
+    assert serial
+    assert annotator.analyze_parallel(TEXT, num_workers=2) == serial